@@ -1,59 +1,89 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
 
-# Load the data from the scheduler output file
-with open("/home/aditya/Projects/MCN/UpgradScheduler/Automated/scheduler_output.log", "r") as file:
-    data = file.readlines()
-
-# Inspect the first few lines
-print("Initial DataFrame Structure:")
-for line in data[:5]:  # Print the first 5 lines
-    print(line.strip())
-
-# Extract relevant information from the log messages
-timestamps = []
-messages = []
-source_ips = []
-destination_ips = []
-packet_sizes = []
-qos_types = []
-
-# Regular expression patterns for extracting information
-pattern = re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (?P<action>.+?): (?P<value>.+)')
-
-for line in data:
-    match = pattern.match(line.strip())
-    if match:
-        timestamps.append(match.group('timestamp'))
-        messages.append(match.group('action'))
-        value = match.group('value')
-
-        # Extract source IP, destination IP, packet size, and QoS from the value
-        ip_pattern = re.compile(r'(?P<source_ip>[\d.]+) -> (?P<dest_ip>[\d.]+), Size: (?P<size>\d+) bytes, QoS: (?P<qos>\w+)')
-        ip_match = ip_pattern.search(value)
-
-        if ip_match:
-            source_ips.append(ip_match.group('source_ip'))
-            destination_ips.append(ip_match.group('dest_ip'))
-            packet_sizes.append(int(ip_match.group('size')))  # Convert size to int
-            qos_types.append(ip_match.group('qos'))
-        else:
-            source_ips.append(None)
-            destination_ips.append(None)
-            packet_sizes.append(None)
-            qos_types.append(None)
-
-# Create a DataFrame with the extracted information
-output_data = pd.DataFrame({
-    'Timestamp': pd.to_datetime(timestamps),
-    'Message': messages,
-    'Source IP': source_ips,
-    'Destination IP': destination_ips,
-    'Packet Size': packet_sizes,
-    'QoS Type': qos_types
-})
+# Binary event logs (--event-log of either scheduler) are read without any text parsing
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from event_log import events_to_frame, is_event_log, open_event_log
+
+LOG_FILE = sys.argv[1] if len(sys.argv) > 1 else "/home/aditya/Projects/MCN/UpgradScheduler/Automated/scheduler_output.log"
+
+
+def load_event_log(filename):
+    # Same columns as the regex path below; "Message" is the event type
+    events = events_to_frame(open_event_log(filename))
+    return pd.DataFrame({
+        'Timestamp': events['Timestamp'],
+        'Message': events['Event'].astype(str),
+        'Source IP': events['Source IP'],
+        'Destination IP': events['Destination IP'],
+        'Packet Size': events['Packet Size (Bytes)'],
+        'QoS Type': events['QoS Class'].astype(str),
+        'Queueing Delay (ms)': events['Queueing Delay (ms)'],
+    })
+
+
+def load_text_log(filename):
+    # Load the data from the scheduler output file
+    with open(filename, "r") as file:
+        data = file.readlines()
+
+    # Inspect the first few lines
+    print("Initial DataFrame Structure:")
+    for line in data[:5]:  # Print the first 5 lines
+        print(line.strip())
+
+    # Extract relevant information from the log messages
+    timestamps = []
+    messages = []
+    source_ips = []
+    destination_ips = []
+    packet_sizes = []
+    qos_types = []
+
+    # Regular expression patterns for extracting information
+    pattern = re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (?P<action>.+?): (?P<value>.+)')
+    ip_pattern = re.compile(r'(?P<source_ip>[\d.]+) -> (?P<dest_ip>[\d.]+), Size: (?P<size>\d+) bytes, QoS: (?P<qos>\w+)')
+
+    for line in data:
+        match = pattern.match(line.strip())
+        if match:
+            timestamps.append(match.group('timestamp'))
+            messages.append(match.group('action'))
+            value = match.group('value')
+
+            # Extract source IP, destination IP, packet size, and QoS from the value
+            ip_match = ip_pattern.search(value)
+
+            if ip_match:
+                source_ips.append(ip_match.group('source_ip'))
+                destination_ips.append(ip_match.group('dest_ip'))
+                packet_sizes.append(int(ip_match.group('size')))  # Convert size to int
+                qos_types.append(ip_match.group('qos'))
+            else:
+                source_ips.append(None)
+                destination_ips.append(None)
+                packet_sizes.append(None)
+                qos_types.append(None)
+
+    # Create a DataFrame with the extracted information
+    return pd.DataFrame({
+        'Timestamp': pd.to_datetime(timestamps),
+        'Message': messages,
+        'Source IP': source_ips,
+        'Destination IP': destination_ips,
+        'Packet Size': packet_sizes,
+        'QoS Type': qos_types
+    })
+
+
+if is_event_log(LOG_FILE):
+    output_data = load_event_log(LOG_FILE)
+else:
+    output_data = load_text_log(LOG_FILE)
 
 # Print out the new DataFrame
 print("\nExtracted DataFrame:")
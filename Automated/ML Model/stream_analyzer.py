@@ -0,0 +1,291 @@
+import argparse
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import numpy as np
+
+# Log lines, as written by hybrid_scheduler.py ("<asctime> - <message>") and scheduler.py (message only)
+LINE_PATTERN = re.compile(r'(?:(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - )?(?P<message>.*)')
+GENERATED_PATTERN = re.compile(
+    r'Generated Packet: (?P<source_ip>[\d.]+) -> (?P<dest_ip>[\d.]+), Size: (?P<size>\d+) bytes, QoS: (?P<qos>\w+)')
+PROCESSED_PATTERN = re.compile(r'Processing (?P<qos>\w+) Packet: (?P<source_ip>[\d.]+) -> (?P<dest_ip>[\d.]+)')
+DROPPED_PATTERN = re.compile(
+    r'(?P<qos>\w+) Packet dropped(?: due to deadline miss)?: (?P<source_ip>[\d.]+) -> (?P<dest_ip>[\d.]+)')
+
+# Event kinds counted by the analyzer, with the pattern that recognizes each one
+EVENTS = ("Generated", "Processed", "Dropped")
+EVENT_PATTERNS = ((GENERATED_PATTERN, 0), (PROCESSED_PATTERN, 1), (DROPPED_PATTERN, 2))
+
+BUCKET_SECONDS = 10  # Width of one sliding-window bucket
+WINDOW_BUCKETS = 6   # Buckets per window (one minute by default)
+SKETCH_WIDTH = 2048  # Count-min sketch counters per row
+SKETCH_DEPTH = 4     # Count-min sketch rows (independent hashes)
+TOP_K = 10           # Heavy-hitter source IPs tracked per event kind
+BATCH_SIZE = 4096    # IPs buffered before they are added to the sketches in one NumPy call
+HASH_PRIME = (1 << 31) - 1  # Small enough that a * key + b fits in int64
+
+# Function to convert a dotted IPv4 address to an int (None if it is not one)
+def ip_to_int(ip):
+    parts = ip.split(".")
+    if len(parts) != 4:
+        return None
+    return (int(parts[0]) << 24) | (int(parts[1]) << 16) | (int(parts[2]) << 8) | int(parts[3])
+
+def int_to_ip(value):
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+# Count-min sketch over integer keys
+class CountMinSketch:
+    """
+    Fixed-size frequency table: every key is counted in one cell of each row and
+    its estimate is the minimum over the rows, which never undercounts. Sketches
+    with the same seed are linear, so window totals can be kept by adding and
+    subtracting per-bucket sketches.
+    """
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        # Multiply-add hashing modulo a prime, one (a, b) pair per row
+        self.a = rng.integers(1, HASH_PRIME, depth)[:, None]
+        self.b = rng.integers(0, HASH_PRIME, depth)[:, None]
+        self.rows = np.arange(depth)[:, None]
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def cells(self, keys):
+        # Column of every key in every row, shape (depth, len(keys))
+        keys = np.asarray(keys, dtype=np.int64) % HASH_PRIME
+        return (self.a * keys + self.b) % HASH_PRIME % self.width
+
+    def add(self, keys, counts):
+        np.add.at(self.table, (np.broadcast_to(self.rows, (len(self.rows), len(keys))), self.cells(keys)),
+                  np.broadcast_to(counts, (len(self.rows), len(keys))))
+
+    def estimate(self, keys):
+        return self.table[self.rows, self.cells(keys)].min(axis=0)
+
+    def empty_like(self):
+        sketch = CountMinSketch.__new__(CountMinSketch)
+        sketch.width, sketch.a, sketch.b, sketch.rows = self.width, self.a, self.b, self.rows
+        sketch.table = np.zeros_like(self.table)
+        return sketch
+
+# Count-min sketch plus a bounded set of heavy-hitter candidates
+class TopK:
+    def __init__(self, k=TOP_K, sketch=None):
+        self.k = k
+        self.sketch = sketch if sketch is not None else CountMinSketch()
+        self.candidates = {}  # key -> estimated count, at most k entries
+
+    def add(self, keys, counts):
+        self.sketch.add(keys, counts)
+        self.offer(keys)
+
+    def offer(self, keys):
+        # Keys whose estimate beats the smallest candidate take its place
+        for key, count in zip(keys.tolist(), self.sketch.estimate(keys).tolist()):
+            if key in self.candidates or len(self.candidates) < self.k:
+                self.candidates[key] = count
+                continue
+            smallest = min(self.candidates, key=self.candidates.get)
+            if count > self.candidates[smallest]:
+                del self.candidates[smallest]
+                self.candidates[key] = count
+
+    def refresh(self):
+        # Re-estimate after the sketch shrank (a window bucket expired)
+        if self.candidates:
+            keys = np.fromiter(self.candidates, dtype=np.int64)
+            self.candidates = {key: count for key, count in zip(keys.tolist(), self.sketch.estimate(keys).tolist())
+                               if count > 0}
+
+    def top(self):
+        return sorted(self.candidates.items(), key=lambda item: -item[1])
+
+# Counters of one time bucket
+class Bucket:
+    def __init__(self, start, sketches):
+        self.start = start
+        self.counts = Counter()  # (event, qos) -> packets
+        self.sketches = [sketch.empty_like() for sketch in sketches]  # Source IPs per event kind
+
+# Incremental log analyzer with sliding-window and all-time statistics
+class StreamAnalyzer:
+    """
+    Consumes log lines one at a time. Per-QoS processed/dropped/generated counts
+    are exact; source IPs go into count-min sketches with top-k candidates, so
+    memory is bounded by the window length and sketch size, not by the log size.
+    The window is in log time: WINDOW_BUCKETS buckets of BUCKET_SECONDS each.
+    """
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, window_buckets=WINDOW_BUCKETS, k=TOP_K):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.totals = Counter()  # (event, qos) -> packets since the start
+        self.window_counts = Counter()
+        self.all_time = [TopK(k, CountMinSketch(seed=event)) for event in range(len(EVENTS))]
+        self.window = [TopK(k, CountMinSketch(seed=event)) for event in range(len(EVENTS))]
+        self.buckets = deque()
+        self.pending = [[] for _ in EVENTS]  # Source IPs not yet added to the sketches
+        self.lines = 0
+        self.unmatched = 0
+        self.last_time = None
+        self.cached_stamp = (None, None)  # Log timestamps repeat, so parse each one once
+
+    def parse_time(self, stamp):
+        if stamp is None:
+            return time.time()
+        if self.cached_stamp[0] != stamp:
+            self.cached_stamp = (stamp, datetime.fromisoformat(stamp).timestamp())
+        return self.cached_stamp[1]
+
+    def add_line(self, line):
+        self.lines += 1
+        match = LINE_PATTERN.match(line.rstrip("\n"))
+        message = match.group("message")
+        for pattern, event in EVENT_PATTERNS:
+            event_match = pattern.match(message)
+            if event_match:
+                break
+        else:
+            self.unmatched += 1
+            return
+        self.advance(self.parse_time(match.group("timestamp")))
+        key = (event, event_match.group("qos"))
+        self.totals[key] += 1
+        self.window_counts[key] += 1
+        self.buckets[-1].counts[key] += 1
+        ip = ip_to_int(event_match.group("source_ip"))
+        if ip is not None:
+            self.pending[event].append(ip)
+            if len(self.pending[event]) >= BATCH_SIZE:
+                self.flush()
+
+    def advance(self, now):
+        # Open the bucket for now and expire buckets that left the window
+        self.last_time = now
+        if self.buckets and now < self.buckets[-1].start + self.bucket_seconds:
+            return
+        self.flush()
+        start = now - now % self.bucket_seconds
+        self.buckets.append(Bucket(start, [top.sketch for top in self.window]))
+        expired = False
+        while self.buckets[0].start <= start - self.window_buckets * self.bucket_seconds:
+            bucket = self.buckets.popleft()
+            self.window_counts.subtract(bucket.counts)
+            for top, sketch in zip(self.window, bucket.sketches):
+                top.sketch.table -= sketch.table
+            expired = True
+        if expired:
+            self.window_counts = +self.window_counts  # Drop zero entries
+            for top in self.window:
+                top.refresh()
+
+    def flush(self):
+        # Add the buffered source IPs of every event kind in one vectorized pass
+        for event, ips in enumerate(self.pending):
+            if not ips:
+                continue
+            keys, counts = np.unique(np.array(ips, dtype=np.int64), return_counts=True)
+            self.all_time[event].add(keys, counts)
+            self.window[event].add(keys, counts)
+            self.buckets[-1].sketches[event].add(keys, counts)
+            ips.clear()
+
+    def snapshot(self):
+        """
+        Current statistics as plain dicts: per-(event, QoS) counts for the window
+        and since the start, and the top source IPs per event kind.
+        """
+        self.flush()
+        return {
+            "lines": self.lines,
+            "unmatched": self.unmatched,
+            "window_seconds": self.window_buckets * self.bucket_seconds,
+            "window": {(EVENTS[event], qos): count for (event, qos), count in sorted(self.window_counts.items())},
+            "totals": {(EVENTS[event], qos): count for (event, qos), count in sorted(self.totals.items())},
+            "window_top": {EVENTS[event]: [(int_to_ip(key), count) for key, count in top.top()]
+                           for event, top in enumerate(self.window)},
+            "all_time_top": {EVENTS[event]: [(int_to_ip(key), count) for key, count in top.top()]
+                             for event, top in enumerate(self.all_time)},
+        }
+
+# Function to print a snapshot as a short report
+def print_report(stats, top=5):
+    print(f"\n{stats['lines']} lines read ({stats['unmatched']} not packet events), "
+          f"window = last {stats['window_seconds']} s of log time")
+    qos_classes = sorted({qos for _, qos in stats["totals"]})
+    print(f"{'QoS':<8}" + "".join(f"{event + ' (win)':>17}{event + ' (all)':>17}" for event in EVENTS)
+          + f"{'Drop rate (win)':>17}")
+    for qos in qos_classes:
+        row = f"{qos:<8}"
+        for event in EVENTS:
+            row += f"{stats['window'].get((event, qos), 0):>17}{stats['totals'].get((event, qos), 0):>17}"
+        processed = stats["window"].get(("Processed", qos), 0)
+        dropped = stats["window"].get(("Dropped", qos), 0)
+        row += f"{dropped / max(processed + dropped, 1):>17.2%}"
+        print(row)
+    for event in EVENTS:
+        if stats["window_top"][event]:
+            talkers = ", ".join(f"{ip} ({count})" for ip, count in stats["window_top"][event][:top])
+            print(f"Top {event.lower()} source IPs (window, approx.): {talkers}")
+
+# Generator over the lines of a growing file, like tail -f
+def follow(filename, poll_interval=0.5, from_start=True):
+    """
+    Yields complete lines as they are appended and None whenever it is idle, so
+    the caller can report between reads. Starts over if the file is truncated.
+    """
+    with open(filename, "r") as file:
+        if not from_start:
+            file.seek(0, 2)
+        partial = ""
+        while True:
+            line = file.readline()
+            if line.endswith("\n"):
+                yield partial + line
+                partial = ""
+                continue
+            partial += line  # A line still being written; keep it until its newline arrives
+            position = file.tell()
+            file.seek(0, 2)
+            if file.tell() < position:
+                file.seek(0)  # Truncated or rotated in place
+                partial = ""
+            else:
+                file.seek(position)
+            yield None
+            time.sleep(poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental statistics over a scheduler log.")
+    parser.add_argument("log", nargs="?", default="scheduler_output.log")
+    parser.add_argument("--follow", action="store_true", help="keep reading as the log grows (like tail -f)")
+    parser.add_argument("--from-end", action="store_true", help="with --follow, skip lines already in the log")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between live reports")
+    parser.add_argument("--bucket-seconds", type=int, default=BUCKET_SECONDS, help="width of one window bucket")
+    parser.add_argument("--window-buckets", type=int, default=WINDOW_BUCKETS, help="buckets per sliding window")
+    parser.add_argument("--top", type=int, default=TOP_K, help="heavy-hitter source IPs to track")
+    args = parser.parse_args()
+
+    analyzer = StreamAnalyzer(args.bucket_seconds, args.window_buckets, args.top)
+    if not args.follow:
+        with open(args.log, "r") as file:
+            for line in file:
+                analyzer.add_line(line)
+        print_report(analyzer.snapshot(), args.top)
+        return
+
+    next_report = time.monotonic() + args.report_interval
+    try:
+        for line in follow(args.log, from_start=not args.from_end):
+            if line is not None:
+                analyzer.add_line(line)
+            if time.monotonic() >= next_report:
+                print_report(analyzer.snapshot(), args.top)
+                next_report = time.monotonic() + args.report_interval
+    except KeyboardInterrupt:
+        print_report(analyzer.snapshot(), args.top)
+
+if __name__ == "__main__":
+    main()
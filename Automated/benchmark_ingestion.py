@@ -0,0 +1,93 @@
+import argparse
+import queue
+import threading
+import time
+from datetime import datetime
+
+from hybrid_scheduler import DROPPED_MSG, PROCESSED_MSG, TIME_SLOT, Scheduler, generate_packet
+from log_sink import AsyncLogSink
+
+# Previous ingestion path: one lock around queue.Queue, held for the whole drain
+class LockedScheduler(Scheduler):
+    def __init__(self, log_sink=None):
+        super().__init__(log_sink)
+        self.urllc_queue = queue.Queue()
+        self.embb_queue = queue.Queue()
+        self.mmtc_queue = queue.Queue()
+        self.lock = threading.Lock()
+
+    def add_packet(self, packet):
+        with self.lock:
+            if packet.qos_class == "uRLLC":
+                self.urllc_queue.put(packet)
+            elif packet.qos_class == "eMBB":
+                self.embb_queue.put(packet)
+            else:
+                self.mmtc_queue.put(packet)
+
+    def process_slot(self, now):
+        with self.lock:
+            for qos_class, packet_queue in (("uRLLC", self.urllc_queue), ("eMBB", self.embb_queue),
+                                            ("mMTC", self.mmtc_queue)):
+                while not packet_queue.empty():
+                    packet = packet_queue.get()
+                    if packet.deadline is None or now <= packet.deadline:
+                        self.log_sink.emit(PROCESSED_MSG, qos_class, packet.source_ip, packet.destination_ip)
+                    else:
+                        self.log_sink.emit(DROPPED_MSG, qos_class, packet.source_ip, packet.destination_ip)
+
+# Function to measure ingestion throughput for a number of producer threads
+def measure(scheduler_class, producers, packets_per_producer, time_slot):
+    """
+    Every producer enqueues the same pre-built packets as fast as it can while
+    the consumer drains once per time slot. Returns packets per second from the
+    first enqueue until every packet has been drained.
+    """
+    scheduler = scheduler_class(AsyncLogSink(None, quiet=True))
+    packets = [generate_packet(datetime.now()) for _ in range(packets_per_producer)]
+    done = threading.Event()
+    drained = 0
+
+    def produce():
+        add_packet = scheduler.add_packet
+        for packet in packets:
+            add_packet(packet)
+
+    def consume():
+        nonlocal drained
+        total = producers * packets_per_producer
+        while drained < total:
+            before = scheduler.log_sink.skipped
+            scheduler.process_slot(datetime.now())
+            drained += scheduler.log_sink.skipped - before
+            time.sleep(time_slot)
+        done.set()
+
+    threads = [threading.Thread(target=produce) for _ in range(producers)]
+    consumer = threading.Thread(target=consume)
+    start = time.perf_counter()
+    consumer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.wait()
+    elapsed = time.perf_counter() - start
+    consumer.join()
+    return producers * packets_per_producer / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion throughput vs. number of producer threads.")
+    parser.add_argument("--producers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--packets", type=int, default=50_000, help="packets enqueued per producer")
+    parser.add_argument("--time-slot", type=float, default=TIME_SLOT / 10, help="consumer drain interval (s)")
+    args = parser.parse_args()
+
+    print(f"{'producers':>9}  {'locked queue.Queue':>20}  {'lock-free deque':>16}  {'speedup':>7}")
+    for producers in args.producers:
+        locked = measure(LockedScheduler, producers, args.packets, args.time_slot)
+        lock_free = measure(Scheduler, producers, args.packets, args.time_slot)
+        print(f"{producers:>9}  {locked:>14,.0f} pkt/s  {lock_free:>10,.0f} pkt/s  {lock_free / locked:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,57 @@
+import argparse
+import asyncio
+import heapq
+import itertools
+import os
+import sys
 import threading
-import queue
 import random
 import time
-import logging
+from collections import deque
 from datetime import datetime, timedelta
 
+import numpy as np
+
+# Share the asynchronous log sink with the trace scheduler
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from event_log import DROPPED, GENERATED, PROCESSED, EventLogSink, event_record
+from latency import OVERHEAD_BUDGET, REPORT_INTERVAL, LatencyRecorder
+from log_sink import BLOCK, POLICIES, AsyncLogSink
+
+# Per-QoS arrival models for --arrivals models, shared with the trace generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Dataset"))
+from dataset import (EMBB_DWELL, EMBB_RATES, MMTC_RATE, URLLC_DEVICES, URLLC_JITTER, URLLC_PERIOD, mmpp_arrivals,
+                     periodic_arrivals, poisson_arrivals)
+
 # Constants
 LATENCY_THRESHOLD_URLLC = 0.005  # 5 ms threshold for uRLLC packets
 TIME_SLOT = 0.1  # Scheduler time slot (100 ms)
+GENERATION_INTERVAL = 0.05  # One generated packet every 50 ms
+UE_RATE = 1.0  # Mean packets per second of one simulated UE in asyncio mode
+SIMULATION_EPOCH = datetime(2024, 1, 1)  # Virtual clock origin for simulated runs
+LOG_FILE = 'scheduler_output.log'
+QOS_CODES = {"uRLLC": 0, "eMBB": 1, "mMTC": 2}  # Event log codes, as in scheduler.QOS_CLASSES
+EPOCH = datetime(1970, 1, 1)
 
-# Setup logging to file
-logging.basicConfig(
-    filename='scheduler_output.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Event kinds for the simulated run; at equal times packets are generated before the slot
+GENERATE, SLOT = 0, 1
+
+# Log line templates; formatted on the log writer thread, not by the scheduler
+GENERATED_MSG = "Generated Packet: {} -> {}, Size: {} bytes, QoS: {}".format
+PROCESSED_MSG = "Processing {} Packet: {} -> {}".format
+DROPPED_MSG = "{} Packet dropped: {} -> {}".format
 
 # Class to represent a packet
 class Packet:
-    def __init__(self, timestamp, source_ip, destination_ip, protocol, packet_size, qos_class):
-        self.timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    def __init__(self, timestamp, source_ip, destination_ip, protocol, packet_size, qos_class, arrival_time=None):
+        self.timestamp = datetime.fromisoformat(timestamp)
         self.source_ip = source_ip
         self.destination_ip = destination_ip
         self.protocol = protocol
         self.packet_size = int(packet_size)
         self.qos_class = qos_class
-        self.arrival_time = datetime.now()
+        # Simulated runs pass their virtual clock; live packets arrive now
+        self.arrival_time = arrival_time if arrival_time is not None else datetime.now()
         self.deadline = self.calculate_deadline()
 
     def calculate_deadline(self):
@@ -35,91 +60,366 @@ class Packet:
         else:
             return self.arrival_time + timedelta(seconds=0.2)  # 200 ms for eMBB
 
+# Function to convert a naive datetime to epoch nanoseconds
+def datetime_to_ns(value):
+    return (value - EPOCH) // timedelta(microseconds=1) * 1000
+
+# Function to build the binary event record of one packet (runs on the event log's writer thread)
+def packet_record(event, packet, now):
+    now_ns = datetime_to_ns(now)
+    return event_record(now_ns, event, QOS_CODES.get(packet.qos_class, QOS_CODES["mMTC"]), packet.source_ip,
+                        packet.destination_ip, packet.packet_size, now_ns - datetime_to_ns(packet.arrival_time))
+
+# Function to build the event records of one scheduling pass
+def slot_records(now, *queues):
+    return [packet_record(DROPPED if packet.deadline is not None and now > packet.deadline else PROCESSED,
+                          packet, now) for packets in queues for packet in packets]
+
 # Scheduler class
 class Scheduler:
-    def __init__(self):
-        self.urllc_queue = queue.Queue()  # uRLLC packets queue
-        self.embb_queue = queue.Queue()   # eMBB packets queue
-        self.mmtc_queue = queue.Queue()   # mMTC packets queue
-        self.lock = threading.Lock()  # To prevent race conditions
+    def __init__(self, log_sink=None, event_log=None, latency=None, clock=time.monotonic_ns):
+        # deque.append and deque.popleft are atomic, so any number of producer
+        # threads can enqueue without a global lock while one consumer drains
+        self.urllc_queue = deque()  # uRLLC packets queue
+        self.embb_queue = deque()   # eMBB packets queue
+        self.mmtc_queue = deque()   # mMTC packets queue
+        # Same "asctime - message" layout as the old logging setup, written by a background thread
+        self.log_sink = log_sink if log_sink is not None else AsyncLogSink(LOG_FILE, mode="a", timestamps=True, echo=True)
+        self.event_log = event_log  # Optional event_log.EventLogSink for binary records
+        # Optional latency.LatencyRecorder; queueing and service latency are measured
+        # on clock (nanoseconds), which simulated runs replace with their virtual clock
+        self.latency = latency
+        self.clock = clock
 
     def add_packet(self, packet):
-        with self.lock:
-            if packet.qos_class == "uRLLC":
-                self.urllc_queue.put(packet)
-            elif packet.qos_class == "eMBB":
-                self.embb_queue.put(packet)
-            else:
-                self.mmtc_queue.put(packet)
+        packet.enqueued = self.clock()
+        if packet.qos_class == "uRLLC":
+            self.urllc_queue.append(packet)
+        elif packet.qos_class == "eMBB":
+            self.embb_queue.append(packet)
+        else:
+            self.mmtc_queue.append(packet)
+
+    def log_generated(self, packet):
+        self.log_sink.emit(GENERATED_MSG, packet.source_ip, packet.destination_ip, packet.packet_size, packet.qos_class)
+        if self.event_log is not None:
+            self.event_log.emit(packet_record, GENERATED, packet, packet.arrival_time)
+
+    def drain(self, packet_queue):
+        # Take the batch that is queued right now; packets appended meanwhile wait for the next slot
+        popleft = packet_queue.popleft
+        return [popleft() for _ in range(len(packet_queue))]
+
+    def record_latency(self, code, packets, started):
+        if packets:
+            self.latency.record_packets(code, [started - packet.enqueued for packet in packets],
+                                        self.clock() - started)
+
+    def process_slot(self, now):
+        # One scheduling pass; deadlines are checked against the caller's clock.
+        # Producers keep appending while the batches are taken and logged.
+        started = self.clock()
+        urllc_packets = self.drain(self.urllc_queue)
+        embb_packets = self.drain(self.embb_queue)
+        mmtc_packets = self.drain(self.mmtc_queue)
+        if self.event_log is not None:
+            self.event_log.emit(slot_records, now, urllc_packets, embb_packets, mmtc_packets)
+
+        # Process uRLLC packets first
+        for packet in urllc_packets:
+            self.log_sink.emit(PROCESSED_MSG, "uRLLC", packet.source_ip, packet.destination_ip)
+        if self.latency is not None:
+            self.record_latency(QOS_CODES["uRLLC"], urllc_packets, started)
+
+        # Then process eMBB packets, then mMTC packets; only served packets have a latency
+        for qos_class, packets in (("eMBB", embb_packets), ("mMTC", mmtc_packets)):
+            served = []
+            for packet in packets:
+                if now <= packet.deadline:
+                    served.append(packet)
+                    self.log_sink.emit(PROCESSED_MSG, qos_class, packet.source_ip, packet.destination_ip)
+                else:
+                    self.log_sink.emit(DROPPED_MSG, qos_class, packet.source_ip, packet.destination_ip)
+            if self.latency is not None:
+                self.record_latency(QOS_CODES[qos_class], served, started)
+        if self.latency is not None:
+            self.latency.tick()
+
+    def close(self):
+        # Flush both sinks and report the final latency snapshot
+        if self.latency is not None:
+            self.latency.report_snapshot()
+        self.log_sink.close()
+        if self.event_log is not None:
+            self.event_log.close()
 
     def process_packets(self):
+        # Real-time mode: wake on slot boundaries of the monotonic clock so that
+        # processing time does not accumulate as drift
+        next_slot = time.monotonic()
         while True:
-            with self.lock:
-                # Process uRLLC packets first
-                while not self.urllc_queue.empty():
-                    packet = self.urllc_queue.get()
-                    msg = f"Processing uRLLC Packet: {packet.source_ip} -> {packet.destination_ip}"
-                    print(msg)
-                    logging.info(msg)
-
-                # Then process eMBB packets
-                while not self.embb_queue.empty():
-                    packet = self.embb_queue.get()
-                    if datetime.now() <= packet.deadline:
-                        msg = f"Processing eMBB Packet: {packet.source_ip} -> {packet.destination_ip}"
-                    else:
-                        msg = f"eMBB Packet dropped: {packet.source_ip} -> {packet.destination_ip}"
-                    print(msg)
-                    logging.info(msg)
-
-                # Then process mMTC packets
-                while not self.mmtc_queue.empty():
-                    packet = self.mmtc_queue.get()
-                    if datetime.now() <= packet.deadline:
-                        msg = f"Processing mMTC Packet: {packet.source_ip} -> {packet.destination_ip}"
-                    else:
-                        msg = f"mMTC Packet dropped: {packet.source_ip} -> {packet.destination_ip}"
-                    print(msg)
-                    logging.info(msg)
-
-            time.sleep(TIME_SLOT)
+            self.process_slot(datetime.now())
+            next_slot += TIME_SLOT
+            time.sleep(max(0.0, next_slot - time.monotonic()))
 
 # Function to generate random IP addresses
-def generate_random_ip():
-    return f"{random.randint(1, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 255)}"
+def generate_random_ip(rng=random):
+    return f"{rng.randint(1, 255)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 255)}"
 
-# Function to simulate real-time packet generation
-def packet_generator(scheduler):
+# Function to generate one random packet stamped with the given time
+def generate_packet(now, rng=random, source_ip=None, qos_class=None):
     protocols = ["TCP", "UDP"]
     qos_classes = ["uRLLC", "eMBB", "mMTC"]
 
+    timestamp = now.isoformat(sep=" ")
+    source_ip = source_ip or generate_random_ip(rng)
+    destination_ip = generate_random_ip(rng)
+    protocol = rng.choice(protocols)
+    packet_size = rng.randint(50, 1500)  # Bytes
+    qos_class = qos_class or rng.choice(qos_classes)
+    return Packet(timestamp, source_ip, destination_ip, protocol, packet_size, qos_class, arrival_time=now)
+
+# Poisson arrival process
+class PoissonArrivals:
+    def __init__(self, rate):
+        self.rate = rate
+        self.time = 0.0
+
+    def next_arrival(self, rng):
+        # Seconds from the start of the run to the next arrival
+        self.time += rng.expovariate(self.rate)
+        return self.time
+
+# Two-state Markov-modulated Poisson process (quiet/burst), for bursty traffic
+class MmppArrivals:
+    def __init__(self, rates, mean_dwell, rng):
+        self.rates = rates
+        self.mean_dwell = mean_dwell
+        self.state = int(rng.random() < mean_dwell[1] / sum(mean_dwell))  # Stationary start
+        self.state_left = rng.expovariate(1 / mean_dwell[self.state])
+        self.time = 0.0
+
+    def next_arrival(self, rng):
+        # Both the gaps and the sojourns are memoryless, so a gap that outlasts
+        # the current state is simply redrawn in the next one
+        while True:
+            gap = rng.expovariate(self.rates[self.state])
+            if gap < self.state_left:
+                self.state_left -= gap
+                self.time += gap
+                return self.time
+            self.time += self.state_left
+            self.state = 1 - self.state
+            self.state_left = rng.expovariate(1 / self.mean_dwell[self.state])
+
+# Periodic reports from several devices, each with its own phase and per-report jitter
+class PeriodicArrivals:
+    def __init__(self, devices, period, jitter, rng):
+        self.period = period
+        self.jitter = jitter
+        self.schedule = sorted(rng.uniform(0, period) for _ in range(devices))
+        self.time = 0.0
+
+    def next_arrival(self, rng):
+        nominal = heapq.heappop(self.schedule)
+        heapq.heappush(self.schedule, nominal + self.period)
+        # Jitter must not reorder arrivals of the merged stream
+        self.time = max(self.time, nominal + rng.gauss(0, self.jitter))
+        return self.time
+
+# Function to create the per-QoS arrival processes, scaled by load
+def arrival_models(rng, load=1.0):
+    return {
+        "uRLLC": PeriodicArrivals(URLLC_DEVICES, URLLC_PERIOD / load, URLLC_JITTER, rng),
+        "eMBB": MmppArrivals([rate * load for rate in EMBB_RATES], EMBB_DWELL, rng),
+        "mMTC": PoissonArrivals(MMTC_RATE * load),
+    }
+
+# Function to draw every arrival of a simulated run with the vectorized generators of Dataset/dataset.py
+def model_arrivals(duration, seed=None, load=1.0):
+    """
+    Returns the arrival offsets (seconds from the start of the run) of every
+    QoS class within [0, duration), with the same models and rates as
+    arrival_models.
+    """
+    rng = np.random.default_rng(seed)
+    span_ns = int(duration * 1e9)
+    period_ns = int(URLLC_PERIOD / load * 1e9)
+    phases_ns = rng.integers(0, period_ns, URLLC_DEVICES)
+    offsets = {
+        "uRLLC": periodic_arrivals(rng, phases_ns, period_ns, int(URLLC_JITTER * 1e9), 0, span_ns),
+        "eMBB": mmpp_arrivals(rng, np.multiply(EMBB_RATES, load), EMBB_DWELL, span_ns),
+        "mMTC": poisson_arrivals(rng, MMTC_RATE * load, span_ns),
+    }
+    return {qos_class: (times / 1e9).tolist() for qos_class, times in offsets.items()}
+
+# Function to generate packets in real time from the per-QoS arrival models
+def model_packet_generator(scheduler, load=1.0):
+    rng = random.Random()
+    models = arrival_models(rng, load)
+    start = time.monotonic()
+    # Next arrival of every class, merged by time; sleeps target absolute times so they do not drift
+    arrivals = [(model.next_arrival(rng), qos_class) for qos_class, model in models.items()]
+    heapq.heapify(arrivals)
     while True:
-        # Simulate packet generation
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        source_ip = generate_random_ip()
-        destination_ip = generate_random_ip()
-        protocol = random.choice(protocols)
-        packet_size = random.randint(50, 1500)  # Bytes
-        qos_class = random.choice(qos_classes)
+        offset, qos_class = arrivals[0]
+        time.sleep(max(0.0, start + offset - time.monotonic()))
+        packet = generate_packet(datetime.now(), rng, qos_class=qos_class)
+        scheduler.add_packet(packet)
+        scheduler.log_generated(packet)
+        heapq.heapreplace(arrivals, (models[qos_class].next_arrival(rng), qos_class))
 
+# Function to simulate real-time packet generation
+def packet_generator(scheduler):
+    while True:
         # Create a packet and add it to the scheduler
-        packet = Packet(timestamp, source_ip, destination_ip, protocol, packet_size, qos_class)
+        packet = generate_packet(datetime.now())
         scheduler.add_packet(packet)
 
         # Log and print the generated packet details
-        msg = f"Generated Packet: {packet.source_ip} -> {packet.destination_ip}, Size: {packet.packet_size} bytes, QoS: {packet.qos_class}"
-        print(msg)
-        logging.info(msg)
+        scheduler.log_generated(packet)
 
         # Generate a new packet every 50ms
-        time.sleep(0.05)
+        time.sleep(GENERATION_INTERVAL)
+
+# Function to run generator and scheduler on a virtual clock instead of threads
+def run_simulation(scheduler, duration, seed=None, arrivals=None):
+    """
+    Discrete-event replay of the real-time setup: packet generation and slot
+    boundaries are events in a heap ordered by virtual time. Runs as fast as the
+    CPU allows and, for a given seed, drops exactly the same packets every run.
+    With arrivals (see model_arrivals), every QoS class has its own stream of
+    GENERATE events instead of one packet every GENERATION_INTERVAL.
+    """
+    rng = random.Random(seed)
+    seq = itertools.count()
+    virtual_ns = 0
+    scheduler.clock = lambda: virtual_ns  # Latency is measured on the virtual clock
+    # Event times are tick * interval so that float error cannot accumulate
+    events = [(0.0, SLOT, next(seq), 0)]
+    if arrivals is None:
+        events.append((0.0, GENERATE, next(seq), 0))
+    else:
+        # Model-driven GENERATE events carry their QoS class and index instead of a tick
+        for qos_class, offsets in arrivals.items():
+            if offsets:
+                events.append((offsets[0], GENERATE, next(seq), (qos_class, 0)))
+    heapq.heapify(events)
+    while events:
+        offset, kind, _, tick = heapq.heappop(events)
+        now = SIMULATION_EPOCH + timedelta(seconds=offset)
+        virtual_ns = round(offset * 1e9)
+        if kind == GENERATE and arrivals is not None:
+            qos_class, index = tick
+            packet = generate_packet(now, rng, qos_class=qos_class)
+            scheduler.add_packet(packet)
+            scheduler.log_generated(packet)
+            if index + 1 < len(arrivals[qos_class]):
+                heapq.heappush(events, (arrivals[qos_class][index + 1], GENERATE, next(seq), (qos_class, index + 1)))
+        elif kind == GENERATE:
+            packet = generate_packet(now, rng)
+            scheduler.add_packet(packet)
+            scheduler.log_generated(packet)
+            if (tick + 1) * GENERATION_INTERVAL < duration:
+                heapq.heappush(events, ((tick + 1) * GENERATION_INTERVAL, GENERATE, next(seq), tick + 1))
+        else:
+            scheduler.process_slot(now)
+            # One more slot after the last generated packet so that nothing is left queued
+            if offset < duration:
+                heapq.heappush(events, ((tick + 1) * TIME_SLOT, SLOT, next(seq), tick + 1))
+
+# Coroutine for one simulated UE (user device) with its own Poisson arrival process
+async def ue_traffic(scheduler, rate, rng):
+    # A UE keeps its address and QoS class for the whole run
+    source_ip = generate_random_ip(rng)
+    qos_class = rng.choice(["uRLLC", "eMBB", "mMTC"])
+    while True:
+        await asyncio.sleep(rng.expovariate(rate))
+        packet = generate_packet(datetime.now(), rng, source_ip, qos_class)
+        scheduler.add_packet(packet)
+        scheduler.log_generated(packet)
+
+# Coroutine that runs one scheduling pass on every slot boundary
+async def slot_scheduler(scheduler, time_slot=TIME_SLOT):
+    loop = asyncio.get_running_loop()
+    next_slot = loop.time()
+    while True:
+        scheduler.process_slot(datetime.now())
+        # Boundaries are absolute, so late wake-ups do not accumulate as drift;
+        # slots that were missed entirely are skipped rather than run back to back
+        next_slot += time_slot
+        late = loop.time() - next_slot
+        if late > 0:
+            next_slot += (late // time_slot + 1) * time_slot
+        await asyncio.sleep(next_slot - loop.time())
+
+# Function to run the scheduler and many UEs as coroutines in one thread
+async def run_asyncio(scheduler, num_ues, rate=UE_RATE, duration=None, seed=None):
+    rng = random.Random(seed)
+    tasks = [asyncio.create_task(slot_scheduler(scheduler))]
+    tasks += [asyncio.create_task(ue_traffic(scheduler, rate, random.Random(rng.random())))
+              for _ in range(num_ues)]
+    try:
+        await asyncio.wait(tasks, timeout=duration)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Serve whatever arrived after the last slot boundary
+        scheduler.process_slot(datetime.now())
 
 # Main function to start the scheduler and packet generator
 def main():
-    scheduler = Scheduler()
+    parser = argparse.ArgumentParser(description="Real-time 5G packet generator and scheduler.")
+    parser.add_argument("--simulate", type=float, metavar="SECONDS",
+                        help="replay SECONDS of traffic on a virtual clock instead of running in real time")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for simulated runs")
+    parser.add_argument("--asyncio", action="store_true", help="run the scheduler and UEs as asyncio coroutines")
+    parser.add_argument("--ues", type=int, default=1000, help="number of simulated UEs in asyncio mode")
+    parser.add_argument("--ue-rate", type=float, default=UE_RATE, help="mean packets per second per UE")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run in asyncio mode")
+    parser.add_argument("--arrivals", choices=["uniform", "models"], default="uniform",
+                        help="one packet every 50 ms, or per-QoS arrival models (periodic uRLLC, MMPP eMBB, Poisson mMTC)")
+    parser.add_argument("--load", type=float, default=1.0, help="traffic load multiplier for --arrivals models")
+    parser.add_argument("--quiet", action="store_true", help="skip per-packet log lines entirely")
+    parser.add_argument("--log-policy", choices=POLICIES, default=BLOCK, help="what to do when the log buffer is full")
+    parser.add_argument("--event-log", default=None, metavar="PATH",
+                        help="also append fixed-size binary event records (see event_log.py) to PATH")
+    parser.add_argument("--latency", action="store_true",
+                        help="record per-QoS queueing and service latency histograms and report snapshots")
+    parser.add_argument("--latency-interval", type=float, default=REPORT_INTERVAL,
+                        help="seconds between latency snapshots")
+    args = parser.parse_args()
+
+    log_sink = AsyncLogSink(LOG_FILE, policy=args.log_policy, mode="a", timestamps=True, echo=True, quiet=args.quiet)
+    event_log = EventLogSink(args.event_log, policy=args.log_policy, mode="ab") if args.event_log else None
+    latency = None
+    if args.latency:
+        # Simulated runs are not paced by the wall clock, so the overhead budget does not apply to them
+        latency = LatencyRecorder(tuple(QOS_CODES), LATENCY_THRESHOLD_URLLC, QOS_CODES["uRLLC"], args.latency_interval,
+                                  budget=OVERHEAD_BUDGET if args.simulate is None else None)
+    scheduler = Scheduler(log_sink, event_log, latency)
+
+    if args.simulate is not None:
+        arrivals = model_arrivals(args.simulate, args.seed, args.load) if args.arrivals == "models" else None
+        run_simulation(scheduler, args.simulate, args.seed, arrivals)
+        scheduler.close()
+        return
+
+    if args.asyncio:
+        try:
+            asyncio.run(run_asyncio(scheduler, args.ues, args.ue_rate, args.duration, args.seed))
+        except KeyboardInterrupt:
+            print("Stopping scheduler...")
+            log_sink.emit("Scheduler stopped.")
+        scheduler.close()
+        return
 
     # Start the packet generator thread
-    generator_thread = threading.Thread(target=packet_generator, args=(scheduler,))
+    if args.arrivals == "models":
+        generator_thread = threading.Thread(target=model_packet_generator, args=(scheduler, args.load))
+    else:
+        generator_thread = threading.Thread(target=packet_generator, args=(scheduler,))
     generator_thread.daemon = True  # Daemonize thread so it exits when main program exits
     generator_thread.start()
 
@@ -128,7 +428,8 @@ def main():
         scheduler.process_packets()
     except KeyboardInterrupt:
         print("Stopping scheduler...")
-        logging.info("Scheduler stopped.")
+        log_sink.emit("Scheduler stopped.")
+        scheduler.close()
 
 if __name__ == "__main__":
     main()
@@ -1,43 +1,113 @@
+import argparse
+import os
+import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
+# Share the columnar packet reader with the main scheduler
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from checkpoint import CHECKPOINT_INTERVAL, Checkpointer, check_mode, object_state, read_checkpoint, restore_object
+from scheduler import (DEFAULT_CHUNK_SIZE, QOS_CLASSES, QOS_MMTC, UNSET_NS, PacketChunkReader, PacketTable,
+                       encode_labels)
+from trace_format import is_column_directory, is_trace, open_columns, open_trace
+from resource_blocks import RB_BYTES, RESOURCE_BLOCKS, TTI, ResourceBlockScheduler
+from predictors import ERROR_SMOOTHING, PREDICTORS, make_predictor
+
+CHECKPOINT_FRAMES = 10_000  # Frames scheduled between checkpoint opportunities in cp_based_scheduler
+BATCH_MODE, STREAM_MODE = "cpshed", "cpshed --stream"  # Checkpoint modes; a run resumes only its own kind
+
 class CPScheduler:
-    def __init__(self, slots_per_frame, latency_constraint, alpha, gamma, dataset_path, frame_duration_minutes=5):
+    def __init__(self, slots_per_frame, latency_constraint, alpha, gamma, dataset_path, frame_duration_minutes=5,
+                 streaming=False, predictor=None):
         self.slots_per_frame = slots_per_frame  # Total slots in a frame
         self.latency_constraint = latency_constraint  # Maximum allowed latency (L)
         self.alpha = alpha  # Target unreliability rate for URLLC
         self.gamma = gamma  # Update step for the reliability adjustment
         self.theta = self.alpha  # Initial threshold
         self.frame_duration = timedelta(minutes=frame_duration_minutes)  # Frame duration in minutes
-        self.dataset = self.load_dataset(dataset_path)
+        self.dataset_path = dataset_path
+        # In streaming mode the trace is read chunk by chunk by cp_based_scheduler_stream;
+        # with no dataset_path the caller provides the index (see sweep.py)
+        self.dataset = None if streaming or dataset_path is None else self.load_dataset(dataset_path)
+        self.index = self.build_index(self.dataset)
+        self.success_count = 0
+        self.frames_scheduled = 0
+        self.rb_scheduler = None  # Created by rb_based_scheduler on first use
+        # Optional online forecaster (a predictors.PREDICTORS name or instance); without
+        # one, each frame is allocated from its own demand in the dataset
+        if isinstance(predictor, str):
+            predictor = make_predictor(predictor, len(QOS_CLASSES))
+        self.predictor = predictor
+        self.error_scale = 0.0  # Running mean of the absolute URLLC forecast error
 
     def load_dataset(self, dataset_path):
         """
         Load the dataset containing network traffic data.
         Assume dataset has columns: 'Timestamp', 'Source IP', 'Destination IP', 
         'Protocol', 'Packet Size (Bytes)', 'QoS Class'.
+        A binary trace or a directory of .npy columns (see trace_format.py) is
+        memory-mapped as a PacketTable instead.
         """
         try:
+            if is_trace(dataset_path):
+                return PacketTable.from_records(open_trace(dataset_path))
+            if is_column_directory(dataset_path):
+                return PacketTable.from_records(open_columns(dataset_path))
             data = pd.read_csv(dataset_path, parse_dates=['Timestamp'])
             return data
         except FileNotFoundError:
             print(f"Dataset not found at {dataset_path}. Ensure the file path is correct.")
             return None
 
+    def build_index(self, dataset):
+        """
+        Build a one-time index over the dataset: the sorted timestamps (epoch ns)
+        of each QoS class. Counting a class inside any time window is then two
+        binary searches instead of a scan over every row.
+        """
+        if dataset is None:
+            return None
+        if isinstance(dataset, PacketTable):
+            return {qos_class: np.sort(dataset.timestamp[dataset.qos_class == code])
+                    for code, qos_class in enumerate(QOS_CLASSES)}
+        timestamps = dataset['Timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        classes = dataset['QoS Class'].to_numpy()
+        return {qos_class: np.sort(timestamps[classes == qos_class]) for qos_class in QOS_CLASSES}
+
+    def start_time(self):
+        # Timestamp of the first packet in the dataset
+        if isinstance(self.dataset, PacketTable):
+            return pd.Timestamp(int(self.dataset.timestamp.min()))
+        return self.dataset['Timestamp'].min()
+
     def predict_slots(self, frame_start, frame_end, qos_class):
         """
         Use actual traffic from the dataset based on the frame time interval.
         qos_class can be 'uRLLC', 'eMBB', or 'mMTC'.
         """
-        if self.dataset is None:
+        if self.index is None or qos_class not in self.index:
             return 0  # No data, so no packets to schedule
 
-        # Filter packets by QoS class that fall within the frame time window
-        packets = self.dataset[(self.dataset['Timestamp'] >= frame_start) & 
-                               (self.dataset['Timestamp'] < frame_end) &
-                               (self.dataset['QoS Class'] == qos_class)]
+        # Packets of this class with frame_start <= Timestamp < frame_end, in O(log n)
+        timestamps = self.index[qos_class]
+        start, end = np.searchsorted(timestamps, [pd.Timestamp(frame_start).as_unit('ns').value,
+                                                  pd.Timestamp(frame_end).as_unit('ns').value])
+        return int(end - start)
 
-        return len(packets)
+    def frame_demand(self, start_time, frame_count):
+        """
+        Per-class packet counts for frame_count consecutive frames from start_time,
+        as an array of shape (frame_count, 3) in uRLLC, eMBB, mMTC order.
+        """
+        demand = np.zeros((frame_count, len(QOS_CLASSES)), dtype=np.int64)
+        if self.index is None:
+            return demand
+        frame_ns = self.frame_duration // timedelta(microseconds=1) * 1000
+        edges = pd.Timestamp(start_time).as_unit('ns').value + frame_ns * np.arange(frame_count + 1, dtype=np.int64)
+        for column, qos_class in enumerate(QOS_CLASSES):
+            demand[:, column] = np.diff(np.searchsorted(self.index[qos_class], edges))
+        return demand
 
     def allocate_slots(self, urllc_packets, embb_packets, mmtc_packets):
         """
@@ -59,55 +129,414 @@ class CPScheduler:
 
         return urllc_allocated, embb_allocated, mmtc_allocated
 
-    def cp_based_scheduler(self):
+    def allocate_slots_batch(self, urllc_packets, embb_packets, mmtc_packets):
         """
-        CP-based dynamic adjustment of URLLC, eMBB, and mMTC allocation.
+        Vectorized allocate_slots: takes arrays of per-frame demand and returns
+        the per-frame allocations for every frame in one pass.
         """
-        start_time = self.dataset['Timestamp'].min() if self.dataset is not None else datetime.now()
-        frame_count = 100  # Total frames to simulate
-        reliability_target = 1 - self.alpha
-        success_count = 0
+        urllc_packets = np.asarray(urllc_packets, dtype=np.int64)
+        embb_packets = np.asarray(embb_packets, dtype=np.int64)
+        mmtc_packets = np.asarray(mmtc_packets, dtype=np.int64)
+
+        max_urllc_slots = int(0.6 * self.slots_per_frame)
+        urllc_allocated = np.minimum(urllc_packets, max_urllc_slots)
+        remaining_slots = self.slots_per_frame - urllc_allocated
+
+        max_embb_slots = int(0.3 * self.slots_per_frame)
+        embb_allocated = np.minimum(embb_packets, np.maximum(remaining_slots, max_embb_slots))
+        remaining_slots -= embb_allocated
+
+        mmtc_allocated = np.minimum(mmtc_packets, remaining_slots)
+
+        return urllc_allocated, embb_allocated, mmtc_allocated
+
+    def schedule_frames(self, demand):
+        """
+        Allocate a block of frames from their predicted demand (shape (frames, 3),
+        uRLLC/eMBB/mMTC) and replay the theta feedback loop for all of them at once:
+        theta after frame k is theta + gamma * cumsum(feedback - reliability_target).
+        Returns a dict of per-frame arrays and carries success counts and theta
+        over to the next block.
+        """
+        demand = np.asarray(demand, dtype=np.int64).reshape(-1, len(QOS_CLASSES))
+        if self.predictor is not None:
+            return self.schedule_frames_online(demand)
+
+        # Step 3: Allocate slots based on predictions
+        urllc_allocated, embb_allocated, mmtc_allocated = self.allocate_slots_batch(
+            demand[:, 0], demand[:, 1], demand[:, 2]
+        )
 
-        for frame in range(frame_count):
-            # Step 1: Define frame time interval
-            frame_start = start_time + frame * self.frame_duration
-            frame_end = frame_start + self.frame_duration
+        # Successful URLLC frames are those whose whole demand fit in the allocation
+        feedback = (demand[:, 0] <= urllc_allocated).astype(np.int64)
 
-            # Step 2: Predict slots needed based on dataset for each class
-            predicted_urllc = self.predict_slots(frame_start, frame_end, 'uRLLC')
-            predicted_embb = self.predict_slots(frame_start, frame_end, 'eMBB')
-            predicted_mmtc = self.predict_slots(frame_start, frame_end, 'mMTC')
+        # Step 4: Update theta using the feedback
+        frames, theta, successes = self.track_feedback(feedback)
+
+        return {
+            "frame": frames - 1,
+            "predicted_urllc": demand[:, 0],
+            "predicted_embb": demand[:, 1],
+            "predicted_mmtc": demand[:, 2],
+            "urllc_allocated": urllc_allocated,
+            "embb_allocated": embb_allocated,
+            "mmtc_allocated": mmtc_allocated,
+            "feedback": feedback,
+            "theta": theta,
+            "success_rate": successes / frames,
+        }
+
+    def schedule_frames_online(self, demand):
+        """
+        Same results as schedule_frames, but each frame is allocated from the
+        predictor's forecast; the frame's demand is only observed afterwards and
+        fed back to the predictor. The URLLC request is the forecast plus a
+        conformal margin, theta times the running mean absolute URLLC forecast
+        error, and theta moves by gamma * (miss - alpha) after every frame, where
+        a miss is URLLC demand above the request. Frames are handled one at a
+        time in O(1) each, so blocks can be as small as a single frame.
+        """
+        frame_count = len(demand)
+        forecasts = np.zeros((frame_count, len(QOS_CLASSES)), dtype=np.int64)
+        allocated = np.zeros((frame_count, len(QOS_CLASSES)), dtype=np.int64)
+        margins = np.zeros(frame_count)
+        theta = np.zeros(frame_count)
+        for frame, observed in enumerate(demand.tolist()):
+            # Step 2: Forecast this frame from the frames before it
+            forecast = self.predictor.predict()
+            forecasts[frame] = np.maximum(np.rint(forecast), 0)
+            margins[frame] = self.theta * self.error_scale
+            urllc_request = int(forecasts[frame, 0] + np.ceil(margins[frame]))
 
             # Step 3: Allocate slots based on predictions
-            urllc_allocated, embb_allocated, mmtc_allocated = self.allocate_slots(
-                predicted_urllc, predicted_embb, predicted_mmtc
-            )
-
-            # Check if all URLLC packets are within latency
-            if predicted_urllc <= urllc_allocated:
-                success_count += 1
-                feedback = 1  # Successful URLLC transmission
-            else:
-                feedback = 0  # Unsuccessful URLLC transmission
+            allocated[frame] = self.allocate_slots(urllc_request, *forecasts[frame, 1:].tolist())
+
+            # Step 4: Update theta with the prediction error, then the predictor
+            miss = observed[0] > urllc_request
+            self.theta = max(self.theta + self.gamma * (miss - self.alpha), 0.0)  # A margin never shrinks the forecast
+            theta[frame] = self.theta
+            self.error_scale += ERROR_SMOOTHING * (abs(observed[0] - forecast[0]) - self.error_scale)
+            self.predictor.update(np.asarray(observed, dtype=np.float64))
+
+        # Successful URLLC frames are those whose whole demand fit in the allocation
+        feedback = (demand[:, 0] <= allocated[:, 0]).astype(np.int64)
+        successes = self.success_count + np.cumsum(feedback)
+        frames = self.frames_scheduled + np.arange(1, frame_count + 1)
+        if frame_count:
+            self.success_count = int(successes[-1])
+            self.frames_scheduled = int(frames[-1])
 
-            # Step 4: Update theta using the feedback
-            self.theta += self.gamma * (feedback - reliability_target)
-            adjusted_alpha = max(0, min(1, self.theta))
+        return {
+            "frame": frames - 1,
+            "predicted_urllc": forecasts[:, 0],
+            "predicted_embb": forecasts[:, 1],
+            "predicted_mmtc": forecasts[:, 2],
+            "demand_urllc": demand[:, 0],
+            "demand_embb": demand[:, 1],
+            "demand_mmtc": demand[:, 2],
+            "urllc_allocated": allocated[:, 0],
+            "embb_allocated": allocated[:, 1],
+            "mmtc_allocated": allocated[:, 2],
+            "margin": margins,
+            "feedback": feedback,
+            "theta": theta,
+            "success_rate": successes / frames,
+        }
 
-            # Step 5: Print performance for the frame
-            print(f"Frame {frame + 1}: Predicted URLLC = {predicted_urllc}, "
-                  f"eMBB = {predicted_embb}, mMTC = {predicted_mmtc}, "
+    def track_feedback(self, feedback):
+        """
+        Replay the theta feedback loop for a block of per-frame URLLC feedback
+        (1 = success) and carry success counts and theta over to the next block.
+        Returns the per-frame frame numbers (1-based), theta and success counts.
+        """
+        reliability_target = 1 - self.alpha
+        successes = self.success_count + np.cumsum(feedback)
+        frames = self.frames_scheduled + np.arange(1, len(feedback) + 1)
+        theta = self.theta + self.gamma * np.cumsum(feedback - reliability_target)
+
+        if len(feedback):
+            self.theta = float(theta[-1])
+            self.success_count = int(successes[-1])
+            self.frames_scheduled = int(frames[-1])
+        return frames, theta, successes
+
+    def build_rb_scheduler(self, tti=TTI, resource_blocks=RESOURCE_BLOCKS, rb_bytes=RB_BYTES):
+        # Per-packet arrival times, sizes and class codes for the resource-block scheduler
+        if isinstance(self.dataset, PacketTable):
+            timestamps, sizes, classes = self.dataset.timestamp, self.dataset.packet_size, self.dataset.qos_class
+        elif self.dataset is not None:
+            timestamps = self.dataset['Timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+            sizes = self.dataset['Packet Size (Bytes)'].to_numpy()
+            classes = encode_labels(self.dataset['QoS Class'], QOS_CLASSES, QOS_MMTC)
+        else:
+            timestamps, sizes, classes = [], [], []
+        return ResourceBlockScheduler(timestamps, sizes, classes, self.slots_per_frame, self.latency_constraint,
+                                      tti, resource_blocks, rb_bytes)
+
+    def rb_based_scheduler(self, frame_count=None, verbose=True, **options):
+        """
+        Packet-size-aware scheduling on resource blocks (see resource_blocks.py):
+        a frame is slots_per_frame TTIs, latency_constraint is in TTIs, and queued
+        packets carry over to the next frame and the next call. A frame is a URLLC
+        success when none of its URLLC packets missed the latency constraint or
+        was too large to fit in a slot.
+        options (tti, resource_blocks, rb_bytes) apply when the first call builds
+        the scheduler. Runs until every queue has drained unless frame_count is given.
+        """
+        if self.rb_scheduler is None:
+            self.rb_scheduler = self.build_rb_scheduler(**options)
+        results = self.rb_scheduler.schedule_frames(frame_count)
+        feedback = ((results["dropped"][:, 0] == 0) & (results["oversized"][:, 0] == 0)).astype(np.int64)
+        frames, theta, successes = self.track_feedback(feedback)
+        results.update(frame=frames - 1, feedback=feedback, theta=theta,
+                       success_rate=successes / np.maximum(frames, 1))
+        if verbose:
+            self.print_rb_summary(results)
+        return results
+
+    def print_rb_summary(self, results):
+        engine = self.rb_scheduler
+        frames = len(results["frame"])
+        capacity = frames * self.slots_per_frame * engine.resource_blocks
+        print(f"Scheduled {frames} frames of {self.slots_per_frame} x {engine.tti_ns / 1e6:g} ms slots, "
+              f"{engine.resource_blocks} resource blocks of {engine.rb_bytes} bytes each")
+        served = results["served"].sum(axis=0)
+        for code, qos_class in enumerate(QOS_CLASSES):
+            delay = (results["delay_ms"][:, code] * results["served"][:, code]).sum() / max(served[code], 1)
+            print(f"{qos_class}: served = {served[code]}, dropped = {results['dropped'][:, code].sum()}, "
+                  f"oversized = {results['oversized'][:, code].sum()}, mean queueing delay = {delay:.3f} ms, "
+                  f"still queued = {results['backlog'][-1, code] if frames else 0}")
+        print(f"Resource block utilization: {results['resource_blocks'].sum() / max(capacity, 1):.2%}")
+        if self.frames_scheduled:
+            print(f"Final Success Rate over {self.frames_scheduled} frames: "
+                  f"{self.success_count / self.frames_scheduled:.2f}")
+
+    def print_frames(self, results):
+        # Step 5: Print performance for each frame
+        for frame, urllc, embb, mmtc, urllc_allocated, embb_allocated, mmtc_allocated, success_rate in zip(
+                *(results[key].tolist() for key in ("frame", "predicted_urllc", "predicted_embb", "predicted_mmtc",
+                                                    "urllc_allocated", "embb_allocated", "mmtc_allocated",
+                                                    "success_rate"))):
+            print(f"Frame {frame + 1}: Predicted URLLC = {urllc}, "
+                  f"eMBB = {embb}, mMTC = {mmtc}, "
                   f"Allocated (URLLC, eMBB, mMTC) = ({urllc_allocated}, {embb_allocated}, {mmtc_allocated}), "
-                  f"Success Rate: {success_count / (frame + 1):.2f}")
+                  f"Success Rate: {success_rate:.2f}")
 
-        print(f"\nFinal Success Rate over {frame_count} frames: {success_count / frame_count:.2f}")
+    def cp_based_scheduler(self, frame_count=100, verbose=True, start_time=None, checkpoint=None, resume=None):
+        """
+        CP-based dynamic adjustment of URLLC, eMBB, and mMTC allocation.
+        Returns the per-frame result arrays of schedule_frames.
+        With a checkpoint (checkpoint.Checkpointer), frames are scheduled in
+        blocks of CHECKPOINT_FRAMES and the state is saved between blocks when
+        due. resume is a state read from such a checkpoint: the run continues
+        with the frames that were left, and frame_count and start_time are ignored.
+        """
+        if resume is not None:
+            self.restore_state(resume, BATCH_MODE)
+            start_time = pd.Timestamp(int(resume["next_start"]))
+            frame_count = int(resume["frames_left"])
+        else:
+            if start_time is None:
+                start_time = self.start_time() if self.dataset is not None else datetime.now()
+            self.success_count = 0
+            self.frames_scheduled = 0
+
+        # Steps 1-2: Frame intervals and per-class demand for every frame, from the index
+        demand = self.frame_demand(start_time, frame_count)
+
+        # Steps 3-4 for every frame in one vectorized pass
+        if checkpoint is None:
+            results = self.schedule_frames(demand)
+        else:
+            frame_ns = self.frame_duration // timedelta(microseconds=1) * 1000
+            start_ns = pd.Timestamp(start_time).as_unit('ns').value
+            blocks = []
+            for first in range(0, frame_count, CHECKPOINT_FRAMES):
+                blocks.append(self.schedule_frames(demand[first:first + CHECKPOINT_FRAMES]))
+                done = min(first + CHECKPOINT_FRAMES, frame_count)
+                if checkpoint.due() or done == frame_count:
+                    state = self.checkpoint_state(BATCH_MODE, next_start=np.int64(start_ns + done * frame_ns),
+                                                  frames_left=np.int64(frame_count - done))
+                    checkpoint.save(state)
+            checkpoint.close()
+            if blocks:
+                results = {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+            else:
+                results = self.schedule_frames(demand)
+
+        if verbose:
+            self.print_frames(results)
+            print(f"\nFinal Success Rate over {self.frames_scheduled} frames: "
+                  f"{self.success_count / max(self.frames_scheduled, 1):.2f}")
+        return results
+
+    def checkpoint_state(self, mode, **extra):
+        # Theta, counters and predictor state, plus the arrays of the scheduling mode
+        state = {
+            "mode": np.array(mode),
+            "theta": np.float64(self.theta),
+            "success_count": np.int64(self.success_count),
+            "frames_scheduled": np.int64(self.frames_scheduled),
+            "error_scale": np.float64(self.error_scale),
+            **extra,
+        }
+        if self.predictor is not None:
+            state.update(object_state(self.predictor, "predictor"))
+        return state
+
+    def stream_state(self, reader, pending, start_ns, next_frame):
+        return self.checkpoint_state(
+            STREAM_MODE,
+            pending=pending.copy(),
+            start_ns=np.int64(UNSET_NS if start_ns is None else start_ns),
+            next_frame=np.int64(next_frame),
+            late_rows=np.int64(self.late_rows),
+            trace_file=np.array(reader.filename),
+            trace_position=np.int64(reader.position),
+            trace_rows=np.int64(reader.rows_read),
+        )
+
+    def restore_state(self, state, mode):
+        check_mode(state, mode)
+        self.theta = float(state["theta"])
+        self.success_count = int(state["success_count"])
+        self.frames_scheduled = int(state["frames_scheduled"])
+        self.error_scale = float(state["error_scale"])
+        if self.predictor is not None:
+            restore_object(self.predictor, state, "predictor")
+
+    def cp_based_scheduler_stream(self, chunk_size=DEFAULT_CHUNK_SIZE, frame_count=None, checkpoint=None,
+                                  resume=None):
+        """
+        Same as cp_based_scheduler, but reads the dataset chunk by chunk and schedules
+        each frame as soon as a row from a later frame has been read. Only per-frame
+        class counts are kept, so memory does not grow with the file size.
+        When the file ends before frame_count frames, the remaining frames are
+        scheduled with zero demand, as cp_based_scheduler does.
+        Expects the trace in timestamp order; rows that fall into an already
+        scheduled frame are counted in late_rows and otherwise ignored.
+        With a checkpoint, the state (with the counts of unscheduled frames and
+        the reader offset) is saved after a chunk when due; resume continues from
+        such a state without re-reading the rows before the offset.
+        """
+        frame_ns = self.frame_duration // timedelta(microseconds=1) * 1000
+        num_classes = len(QOS_CLASSES)
+        if resume is not None:
+            self.restore_state(resume, STREAM_MODE)
+            pending = resume["pending"].copy()
+            start_ns = None if int(resume["start_ns"]) == UNSET_NS else int(resume["start_ns"])
+            next_frame = int(resume["next_frame"])
+            self.late_rows = int(resume["late_rows"])
+            reader = PacketChunkReader(str(resume["trace_file"]), chunk_size, int(resume["trace_position"]),
+                                       int(resume["trace_rows"]))
+        else:
+            pending = np.zeros((0, num_classes), dtype=np.int64)  # Counts for frames next_frame, next_frame + 1, ...
+            start_ns = None
+            next_frame = 0
+            self.late_rows = 0
+            self.success_count = 0
+            self.frames_scheduled = 0
+            reader = PacketChunkReader(self.dataset_path, chunk_size)
+
+        for chunk in reader:
+            if not len(chunk):
+                continue
+            if start_ns is None:
+                start_ns = chunk.timestamp[0]
+
+            # Bin the chunk into frames relative to the first unscheduled frame
+            offsets = (chunk.timestamp - start_ns) // frame_ns - next_frame
+            on_time = offsets >= 0
+            late = int(np.count_nonzero(~on_time))
+            if late and not self.late_rows:
+                print(f"Warning: the dataset is not in timestamp order; {late} rows of a chunk fall into frames "
+                      f"that were already scheduled and are ignored", file=sys.stderr)
+            self.late_rows += late
+            offsets = offsets[on_time]
+            if not len(offsets):
+                continue
+            counts = np.bincount(offsets * num_classes + chunk.qos_class[on_time],
+                                 minlength=(offsets.max() + 1) * num_classes).reshape(-1, num_classes)
+            if len(counts) > len(pending):
+                pending = np.vstack([pending, np.zeros((len(counts) - len(pending), num_classes), dtype=np.int64)])
+            pending[:len(counts)] += counts
+
+            # Every frame before the latest one seen is complete
+            ready = len(pending) - 1
+            if frame_count is not None:
+                ready = min(ready, frame_count - next_frame)
+            self.print_frames(self.schedule_frames(pending[:ready]))
+            next_frame += ready
+            pending = pending[ready:]
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save(self.stream_state(reader, pending, start_ns, next_frame))
+            if frame_count is not None and next_frame >= frame_count:
+                break
+        else:
+            # End of file: the last frame is complete too, and frames past it have no demand (as in the batch run)
+            if frame_count is not None:
+                missing = max(frame_count - next_frame - len(pending), 0)
+                pending = np.vstack([pending, np.zeros((missing, num_classes), dtype=np.int64)])
+                pending = pending[:frame_count - next_frame]
+            self.print_frames(self.schedule_frames(pending))
+            next_frame += len(pending)
+            pending = pending[:0]
+        if checkpoint is not None:
+            checkpoint.close(self.stream_state(reader, pending, start_ns, next_frame))
+        if self.late_rows:
+            print(f"Warning: {self.late_rows} rows arrived out of timestamp order and were ignored; "
+                  f"sort the dataset or schedule it without --stream", file=sys.stderr)
+
+        if self.frames_scheduled:
+            print(f"\nFinal Success Rate over {self.frames_scheduled} frames: "
+                  f"{self.success_count / self.frames_scheduled:.2f}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CP-based 5G slot scheduler.")
+    parser.add_argument("--stream", action="store_true",
+                        help="schedule frames while the dataset is being read (it must be sorted by timestamp)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per streamed chunk")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="number of frames to simulate (default: 100, or the whole trace with --resource-blocks)")
+    parser.add_argument("--predictor", choices=sorted(PREDICTORS), default=None,
+                        help="forecast each frame online instead of reading its demand from the dataset")
+    parser.add_argument("--resource-blocks", type=int, default=None,
+                        help=f"schedule packet sizes on this many resource blocks per TTI (e.g. {RESOURCE_BLOCKS})")
+    parser.add_argument("--rb-bytes", type=int, default=RB_BYTES, help="bytes carried by one resource block")
+    parser.add_argument("--tti", type=float, default=TTI, help="slot length in seconds for --resource-blocks")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH", help="periodically save the state to PATH")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="seconds between checkpoints")
+    parser.add_argument("--resume", default=None, metavar="PATH",
+                        help="continue the run saved in a checkpoint (with the same --stream and --predictor)")
+    args = parser.parse_args()
+
     slots_per_frame = 50  # Increased slots per frame to handle higher demand
     latency_constraint = 2  # Example: Max latency allowed is 2 slots
     alpha = 0.1  # Example: Target unreliability rate (90% reliability)
     gamma = 0.05  # Adjustment step size
     dataset_path = "5g_network_traffic.csv"  # Replace with your dataset path
 
-    scheduler = CPScheduler(slots_per_frame, latency_constraint, alpha, gamma, dataset_path)
-    scheduler.cp_based_scheduler()
+    # The resource-block scheduler works on the loaded trace, so --stream does not apply to it,
+    # and it is not checkpointed
+    if args.resource_blocks is not None and (args.checkpoint or args.resume):
+        parser.error("--checkpoint and --resume are not supported with --resource-blocks")
+    streaming = args.stream and args.resource_blocks is None
+    scheduler = CPScheduler(slots_per_frame, latency_constraint, alpha, gamma, dataset_path, streaming=streaming,
+                            predictor=args.predictor)
+    checkpoint = Checkpointer(args.checkpoint, args.checkpoint_interval) if args.checkpoint else None
+    resume = read_checkpoint(args.resume) if args.resume else None
+    if resume is not None:
+        try:
+            check_mode(resume, STREAM_MODE if args.stream else BATCH_MODE)
+        except ValueError as error:
+            parser.error(f"{error}; resume with the same --stream setting")
+    if args.resource_blocks is not None:
+        scheduler.rb_based_scheduler(args.frames, tti=args.tti, resource_blocks=args.resource_blocks,
+                                     rb_bytes=args.rb_bytes)
+    elif args.stream:
+        scheduler.cp_based_scheduler_stream(args.chunk_size, 100 if args.frames is None else args.frames,
+                                            checkpoint, resume)
+    else:
+        scheduler.cp_based_scheduler(100 if args.frames is None else args.frames, checkpoint=checkpoint,
+                                     resume=resume)
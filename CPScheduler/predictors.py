@@ -0,0 +1,93 @@
+import numpy as np
+
+# Default smoothing parameters
+EWMA_ALPHA = 0.3
+HW_ALPHA = 0.3           # Level
+HW_BETA = 0.05           # Trend
+HW_GAMMA = 0.1           # Seasonal component
+HW_SEASON = 288          # Frames per season: one day of 5-minute frames
+LMS_LAGS = 4             # Previous frames used by the online linear model
+LMS_STEP = 0.1           # Normalized LMS step size
+ERROR_SMOOTHING = 0.1    # Weight of the newest error in the running mean absolute forecast error
+
+# Online forecasters of per-class demand for the next frame. Each keeps a small
+# rolling state and is updated once per frame with the observed demand, in O(1)
+# per frame (O(lags) for the linear model); nothing is refitted on history.
+# Demand is a vector with one entry per QoS class.
+
+# Exponentially weighted moving average
+class EwmaPredictor:
+    def __init__(self, classes, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self.level = np.zeros(classes)
+        self.initialized = False
+
+    def predict(self):
+        return self.level
+
+    def update(self, demand):
+        if not self.initialized:
+            self.level = np.asarray(demand, dtype=np.float64).copy()
+            self.initialized = True
+            return
+        self.level = self.alpha * demand + (1 - self.alpha) * self.level
+
+# Additive Holt-Winters: level, trend and one seasonal offset per frame of the season
+class HoltWintersPredictor:
+    def __init__(self, classes, alpha=HW_ALPHA, beta=HW_BETA, gamma=HW_GAMMA, season=HW_SEASON):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.level = np.zeros(classes)
+        self.trend = np.zeros(classes)
+        self.seasonal = np.zeros((season, classes))  # Ring buffer indexed by position in the season
+        self.position = 0
+        self.initialized = False
+
+    def predict(self):
+        return self.level + self.trend + self.seasonal[self.position]
+
+    def update(self, demand):
+        demand = np.asarray(demand, dtype=np.float64)
+        if not self.initialized:
+            self.level = demand.copy()
+            self.initialized = True
+        else:
+            seasonal = self.seasonal[self.position]
+            previous = self.level
+            self.level = self.alpha * (demand - seasonal) + (1 - self.alpha) * (self.level + self.trend)
+            self.trend = self.beta * (self.level - previous) + (1 - self.beta) * self.trend
+            self.seasonal[self.position] = self.gamma * (demand - self.level) + (1 - self.gamma) * seasonal
+        self.position = (self.position + 1) % len(self.seasonal)
+
+# Linear model on the last few frames, trained online with normalized LMS
+class LmsPredictor:
+    def __init__(self, classes, lags=LMS_LAGS, step=LMS_STEP):
+        self.step = step
+        # Bias column followed by the last `lags` frames, most recent first
+        self.features = np.ones((classes, lags + 1))
+        # Starts as "same as the last frame"
+        self.weights = np.zeros((classes, lags + 1))
+        self.weights[:, 1] = 1.0
+        self.initialized = False
+
+    def predict(self):
+        return (self.weights * self.features).sum(axis=1)
+
+    def update(self, demand):
+        demand = np.asarray(demand, dtype=np.float64)
+        if not self.initialized:
+            self.features[:, 1:] = demand[:, None]
+            self.initialized = True
+            return
+        features = self.features
+        error = demand - (self.weights * features).sum(axis=1)
+        self.weights += (self.step * error / (1.0 + (features * features).sum(axis=1)))[:, None] * features
+        features[:, 2:] = features[:, 1:-1].copy()
+        features[:, 1] = demand
+
+PREDICTORS = {"ewma": EwmaPredictor, "holt-winters": HoltWintersPredictor, "lms": LmsPredictor}
+
+# Function to create a predictor from its PREDICTORS name
+def make_predictor(name, classes, **options):
+    return PREDICTORS[name](classes, **options)
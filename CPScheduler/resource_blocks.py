@@ -0,0 +1,169 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from scheduler import DEADLINE_NS, QOS_CLASSES
+
+TTI = 0.001            # Transmission time interval (one slot), 1 ms
+RESOURCE_BLOCKS = 100  # Resource blocks per slot
+RB_BYTES = 64          # Payload bytes carried by one resource block
+URLLC_SHARE = 0.6      # uRLLC may use up to 60% of a slot's resource blocks, as in CPScheduler.allocate_slots
+BLOCK_FRAMES = 1000    # Frames whose per-slot load is binned together
+
+# Resource-block scheduler with queues that carry over between frames
+class ResourceBlockScheduler:
+    """
+    Every slot (TTI) has resource_blocks blocks of rb_bytes bytes, and a packet
+    needs ceil(size / rb_bytes) blocks of one slot. Classes are served in
+    priority order with the shares of CPScheduler.allocate_slots: uRLLC up to
+    urllc_share of the blocks, then eMBB and mMTC from what is left. Each class
+    is served FIFO with whole packets, and unserved packets wait for later slots
+    and frames. A uRLLC packet that has waited more than latency_constraint slots
+    is dropped; eMBB and mMTC packets are dropped after their scheduler.DEADLINE_NS.
+    A packet that needs more blocks than its class may use in one slot could
+    never be served, so it is dropped on arrival and counted as oversized
+    instead of blocking its queue until its deadline.
+
+    The per-class queues are never copied: each class keeps its sorted arrival
+    slots and running sums of block costs and arrival slots, and a queue is just
+    a head index into them (its tail is the number of packets that have arrived).
+    Serving a slot is one binary search in the cost sums per class. Runs of
+    frames in which no slot is over capacity and nothing is queued are packed in
+    one vectorized step, since every packet is served in its arrival slot.
+    """
+    def __init__(self, timestamps, packet_sizes, qos_classes, slots_per_frame, latency_constraint, tti=TTI,
+                 resource_blocks=RESOURCE_BLOCKS, rb_bytes=RB_BYTES, urllc_share=URLLC_SHARE):
+        self.slots_per_frame = slots_per_frame
+        self.tti_ns = int(round(tti * 1e9))
+        self.resource_blocks = resource_blocks
+        self.rb_bytes = rb_bytes
+        self.caps = (int(urllc_share * resource_blocks), resource_blocks, resource_blocks)
+        # Slots a packet of each class may wait before it is dropped
+        self.max_wait = (latency_constraint,) + tuple(int(DEADLINE_NS[code] // self.tti_ns)
+                                                      for code in range(1, len(QOS_CLASSES)))
+
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        qos_classes = np.asarray(qos_classes)
+        self.origin = int(timestamps.min()) if len(timestamps) else 0  # Slot 0 starts at the first packet
+        self.arrival = []      # Arrival slot of every packet, per class, sorted
+        self.cost_sum = []     # cost_sum[i] = blocks needed by the first i packets
+        self.arrival_sum = []  # arrival_sum[i] = sum of the first i arrival slots (for queueing delays)
+        self.oversized = []    # Arrival slots of packets larger than their class's per-slot cap, sorted
+        for code in range(len(QOS_CLASSES)):
+            selected = qos_classes == code
+            order = np.argsort(timestamps[selected], kind="stable")
+            slots = (timestamps[selected][order] - self.origin) // self.tti_ns
+            costs = np.maximum(-(-np.asarray(packet_sizes)[selected][order].astype(np.int64) // rb_bytes), 1)
+            fits = costs <= self.caps[code]
+            self.oversized.append(slots[~fits])
+            slots, costs = slots[fits], costs[fits]
+            self.arrival.append(slots)
+            self.cost_sum.append(np.concatenate(([0], np.cumsum(costs))))
+            self.arrival_sum.append(np.concatenate(([0], np.cumsum(slots))))
+
+        self.heads = [0] * len(QOS_CLASSES)  # First queued packet of each class
+        self.next_slot = 0
+
+    def end_slot(self):
+        # First slot after which every packet has been served or dropped
+        return max((int(slots[-1]) + wait + 1 for slots, wait in zip(self.arrival, self.max_wait) if len(slots)),
+                   default=0)
+
+    def schedule_frames(self, frame_count=None):
+        """
+        Schedule frame_count frames from where the previous call stopped (by
+        default, until every queue has drained). Returns per-frame arrays: served,
+        dropped, oversized and backlog packets and mean queueing delay in ms per
+        class (shape (frames, 3)), and the resource blocks used per frame.
+        """
+        if frame_count is None:
+            frame_count = max(-(-(self.end_slot() - self.next_slot) // self.slots_per_frame), 0)
+        classes = len(QOS_CLASSES)
+        results = {
+            "served": np.zeros((frame_count, classes), dtype=np.int64),
+            "dropped": np.zeros((frame_count, classes), dtype=np.int64),
+            "oversized": np.zeros((frame_count, classes), dtype=np.int64),  # Dropped on arrival
+            "backlog": np.zeros((frame_count, classes), dtype=np.int64),
+            "delay_slots": np.zeros((frame_count, classes), dtype=np.int64),  # Summed, averaged below
+            "resource_blocks": np.zeros(frame_count, dtype=np.int64),
+        }
+        for first in range(0, frame_count, BLOCK_FRAMES):
+            self.schedule_block(first, min(BLOCK_FRAMES, frame_count - first), results)
+
+        delay = results.pop("delay_slots")
+        results["delay_ms"] = np.divide(delay * (self.tti_ns / 1e6), results["served"],
+                                        out=np.zeros(delay.shape), where=results["served"] > 0)
+        return results
+
+    def schedule_block(self, first, frames, results):
+        slots_per_frame = self.slots_per_frame
+        start = self.next_slot
+        end = start + frames * slots_per_frame
+        edges = start + slots_per_frame * np.arange(frames + 1, dtype=np.int64)
+
+        # Blocks requested per slot, and the arrivals of every frame, for the whole block
+        load = np.zeros((len(QOS_CLASSES), end - start), dtype=np.int64)
+        frame_edges = []
+        for code, (slots, cost_sum) in enumerate(zip(self.arrival, self.cost_sum)):
+            lo, hi = np.searchsorted(slots, [start, end])
+            load[code] = np.bincount(slots[lo:hi] - start, np.diff(cost_sum[lo:hi + 1]), minlength=end - start)
+            frame_edges.append(np.searchsorted(slots, edges))
+            results["oversized"][first:first + frames, code] = np.diff(np.searchsorted(self.oversized[code], edges))
+        over = (load[0] > self.caps[0]) | (load.sum(axis=0) > self.resource_blocks)
+        overloaded = over.reshape(frames, slots_per_frame).any(axis=1)
+        next_overloaded = np.append(np.flatnonzero(overloaded), frames)
+
+        frame = 0
+        while frame < frames:
+            if not overloaded[frame] and all(head == edges_[frame] for head, edges_ in zip(self.heads, frame_edges)):
+                # Nothing queued and no slot over capacity until the next overloaded frame:
+                # every packet is served in its arrival slot
+                stop = int(next_overloaded[np.searchsorted(next_overloaded, frame)])
+                rows = slice(first + frame, first + stop)
+                for code, edges_ in enumerate(frame_edges):
+                    results["served"][rows, code] = np.diff(edges_[frame:stop + 1])
+                    results["resource_blocks"][rows] += np.diff(self.cost_sum[code][edges_[frame:stop + 1]])
+                    self.heads[code] = int(edges_[stop])
+                frame = stop
+            else:
+                self.schedule_frame(int(edges[frame]), first + frame, results)
+                frame += 1
+        self.next_slot = end
+
+    def schedule_frame(self, start, row, results):
+        # Serve one frame slot by slot
+        slots = np.arange(start, start + self.slots_per_frame)
+        tails = [np.searchsorted(arrival, slots, side="right").tolist() for arrival in self.arrival]
+        # Packets that arrived before slot - max_wait have missed their deadline by then
+        expired = [np.searchsorted(arrival, slots - wait, side="left").tolist()
+                   for arrival, wait in zip(self.arrival, self.max_wait)]
+        served = results["served"][row]
+        dropped = results["dropped"][row]
+        delay = results["delay_slots"][row]
+        used = 0
+        for index, slot in enumerate(slots.tolist()):
+            remaining = self.resource_blocks
+            for code in range(len(QOS_CLASSES)):
+                head = self.heads[code]
+                if expired[code][index] > head:
+                    dropped[code] += expired[code][index] - head
+                    head = expired[code][index]
+                tail = tails[code][index]
+                if head < tail and remaining:
+                    # Longest run of queued packets whose blocks fit in this class's budget
+                    cost_sum = self.cost_sum[code]
+                    budget = min(remaining, self.caps[code])
+                    stop = min(int(np.searchsorted(cost_sum, cost_sum[head] + budget, side="right")) - 1, tail)
+                    if stop > head:
+                        blocks = int(cost_sum[stop] - cost_sum[head])
+                        remaining -= blocks
+                        used += blocks
+                        served[code] += stop - head
+                        arrival_sum = self.arrival_sum[code]
+                        delay[code] += (stop - head) * slot - int(arrival_sum[stop] - arrival_sum[head])
+                        head = stop
+                self.heads[code] = head
+        results["resource_blocks"][row] += used
+        results["backlog"][row] = [tail[-1] - head for tail, head in zip(tails, self.heads)]
@@ -0,0 +1,87 @@
+import argparse
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cpshed import QOS_CLASSES, CPScheduler
+
+# Parameters that can be swept, with the defaults used by cpshed.py
+PARAMETERS = {
+    "slots_per_frame": [50],
+    "latency_constraint": [2],
+    "alpha": [0.1],
+    "gamma": [0.05],
+    "frame_duration_minutes": [5],
+}
+
+# Index shared by every task of a worker process (memory-mapped, read-only)
+_index = None
+
+def _init_worker(index_dir):
+    global _index
+    _index = {qos_class: np.load(os.path.join(index_dir, f"{qos_class}.npy"), mmap_mode="r")
+              for qos_class in QOS_CLASSES}
+
+def _run_combination(params, frame_count, start_time):
+    scheduler = CPScheduler(params["slots_per_frame"], params["latency_constraint"], params["alpha"],
+                            params["gamma"], None, params["frame_duration_minutes"])
+    scheduler.index = _index
+    results = pd.DataFrame(scheduler.cp_based_scheduler(frame_count, verbose=False, start_time=start_time))
+    return results.assign(**params)
+
+# Function to expand a parameter grid into one dict per combination
+def expand_grid(grid):
+    grid = {**PARAMETERS, **grid}
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+# Function to run every combination of the grid over a process pool
+def run_sweep(dataset_path, grid, frame_count=100, workers=None):
+    """
+    Load and index the dataset once, write the per-class index to .npy files and
+    let every worker memory-map them, so the trace is neither re-parsed nor
+    pickled per task. Returns one table with a row per (combination, frame).
+    """
+    loader = CPScheduler(0, 0, 0, 0, dataset_path)
+    if loader.dataset is None:
+        return pd.DataFrame()
+    start_time = loader.start_time()
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        for qos_class, timestamps in loader.index.items():
+            np.save(os.path.join(index_dir, f"{qos_class}.npy"), timestamps)
+        del loader
+
+        combinations = expand_grid(grid)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index_dir,)) as pool:
+            tables = list(pool.map(_run_combination, combinations,
+                                   itertools.repeat(frame_count), itertools.repeat(start_time)))
+
+    return pd.concat(tables, ignore_index=True)
+
+# Function to reduce the sweep table to the final success rate of each combination
+def summarize(results):
+    last_frames = results.groupby(list(PARAMETERS), sort=False).tail(1)
+    return last_frames[list(PARAMETERS) + ["success_rate", "theta"]].reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for CPScheduler.")
+    parser.add_argument("dataset_path", nargs="?", default="5g_network_traffic.csv")
+    parser.add_argument("--slots-per-frame", type=int, nargs="+", default=PARAMETERS["slots_per_frame"])
+    parser.add_argument("--latency-constraint", type=int, nargs="+", default=PARAMETERS["latency_constraint"])
+    parser.add_argument("--alpha", type=float, nargs="+", default=PARAMETERS["alpha"])
+    parser.add_argument("--gamma", type=float, nargs="+", default=PARAMETERS["gamma"])
+    parser.add_argument("--frame-duration-minutes", type=float, nargs="+", default=PARAMETERS["frame_duration_minutes"])
+    parser.add_argument("--frames", type=int, default=100, help="number of frames per combination")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", default="sweep_results.csv", help="per-frame result table")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) for name in PARAMETERS}
+    results = run_sweep(args.dataset_path, grid, args.frames, args.workers)
+    results.to_csv(args.output, index=False)
+    print(summarize(results).to_string(index=False))
+    print(f"\nPer-frame results written to {args.output}")
@@ -1,64 +1,340 @@
-import csv
-import random
-from datetime import datetime, timedelta
-
-# Function to generate random timestamps
-def generate_random_timestamp(start_time, end_time):
-    return start_time + timedelta(seconds=random.randint(0, int((end_time - start_time).total_seconds())))
-
-# Function to generate random network traffic data
-def generate_random_traffic_data(num_entries):
-    # Define the QoS classes
-    qos_classes = ["uRLLC", "eMBB", "mMTC"]
-    
-    # Define the time range for the timestamps
-    start_time = datetime.now()
-    end_time = start_time + timedelta(hours=1)  # Random timestamps within the next hour
-
-    data = []
-    for _ in range(num_entries):
-        # Generate a random timestamp
-        timestamp = generate_random_timestamp(start_time, end_time)
-
-        # Generate random IP addresses
-        source_ip = f"192.168.1.{random.randint(1, 254)}"
-        destination_ip = f"192.168.1.{random.randint(1, 254)}"
-
-        # Randomly choose a protocol and packet size
-        protocol = random.choice(["TCP", "UDP"])
-        packet_size = random.randint(64, 1500)  # Typical packet sizes
-
-        # Randomly select a QoS class
-        qos_class = random.choice(qos_classes)
-
-        # Append the data as a dictionary
-        data.append({
-            "Timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-            "Source IP": source_ip,
-            "Destination IP": destination_ip,
-            "Protocol": protocol,
-            "Packet Size (Bytes)": packet_size,
-            "QoS Class": qos_class
+import argparse
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Share the binary trace format with the schedulers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from trace_format import pack_records, write_trace
+
+# Columns of the generated CSV
+CSV_COLUMNS = ["Timestamp", "Source IP", "Destination IP", "Protocol", "Packet Size (Bytes)", "QoS Class"]
+
+# Column files of the binary format, with their dtypes (same codes as scheduler.PacketTable)
+BINARY_COLUMNS = {
+    "timestamp": np.int64,        # Epoch nanoseconds
+    "source_ip": np.uint32,
+    "destination_ip": np.uint32,
+    "protocol": np.uint8,         # Index into PROTOCOLS
+    "packet_size": np.uint16,
+    "qos_class": np.uint8,        # Index into QOS_CLASSES
+}
+
+QOS_CLASSES = np.array(["uRLLC", "eMBB", "mMTC"], dtype=object)
+PROTOCOLS = np.array(["TCP", "UDP"], dtype=object)
+SUBNET = (192 << 24) | (168 << 16) | (1 << 8)  # Addresses are drawn from 192.168.1.1 - 192.168.1.254
+DEFAULT_CHUNK_SIZE = 1_000_000  # Rows generated and written per chunk
+DURATION = 3600  # Timestamps are spread over one hour
+CHUNK_SECONDS = 60  # Seconds of traffic per chunk when generating from arrival models
+NPY_HEADER_SIZE = 128  # Fixed .npy header size, so the row count can be patched in after appending
+
+# Per-QoS arrival models used with --arrivals models (rates at --load 1)
+URLLC_DEVICES = 10      # uRLLC: periodic reports from this many devices...
+URLLC_PERIOD = 1.0      # ...every URLLC_PERIOD seconds each, with a random phase per device
+URLLC_JITTER = 0.001    # ...and Gaussian jitter (std dev, seconds) on every report
+EMBB_RATES = (5.0, 50.0)  # eMBB: Markov-modulated Poisson, packets/s in the quiet and burst states
+EMBB_DWELL = (30.0, 5.0)  # Mean seconds spent in the quiet and burst states
+MMTC_RATE = 10.0          # mMTC: plain Poisson, packets/s
+PHASE_SEED_KEY = 1 << 32  # SeedSequence key for the device phases; never used by a chunk
+SIZES = np.array([str(i) for i in range(1 << 16)], dtype=object)  # Text of every possible uint16 size
+
+# Function to generate one chunk of traffic as NumPy columns
+def generate_columns(rng, num_entries, window_start_ns, window_end_ns):
+    """
+    Draw every column of num_entries rows at once. Timestamps are uniform over
+    [window_start_ns, window_end_ns) at one-second resolution and sorted, so
+    consecutive chunks with consecutive windows form a time-ordered trace.
+    """
+    timestamps = np.sort(rng.integers(window_start_ns, window_end_ns, num_entries))
+    return generate_packet_columns(rng, timestamps - timestamps % 1_000_000_000)
+
+# Function to draw the per-packet columns that do not depend on the arrival model
+def generate_packet_columns(rng, timestamps, qos_class=None):
+    num_entries = len(timestamps)
+    columns = {
+        "timestamp": timestamps,
+        "source_ip": (SUBNET + rng.integers(1, 255, num_entries)).astype(np.uint32),
+        "destination_ip": (SUBNET + rng.integers(1, 255, num_entries)).astype(np.uint32),
+        "protocol": rng.integers(0, len(PROTOCOLS), num_entries, dtype=np.uint8),
+        "packet_size": rng.integers(64, 1501, num_entries, dtype=np.uint16),  # Typical packet sizes
+    }
+    if qos_class is None:
+        qos_class = rng.integers(0, len(QOS_CLASSES), num_entries, dtype=np.uint8)
+    columns["qos_class"] = qos_class.astype(np.uint8)
+    return columns
+
+# Function to thin arrivals to a daily load curve peaking at peak_hour
+def diurnal_keep(rng, timestamps, amplitude, peak_hour):
+    """
+    Arrivals are generated at the peak rate, (1 + amplitude) times the base rate;
+    each one is kept with probability profile(t) / (1 + amplitude), where
+    profile(t) = 1 + amplitude * cos(2 * pi * (hour_of_day(t) - peak_hour) / 24).
+    """
+    hours = (timestamps / 3.6e12) % 24
+    profile = 1 + amplitude * np.cos(2 * np.pi * (hours - peak_hour) / 24)
+    return rng.random(len(timestamps)) * (1 + amplitude) < profile
+
+# Function to draw Poisson arrival offsets (ns) within [0, span_ns)
+def poisson_arrivals(rng, rate, span_ns):
+    return np.sort(rng.integers(0, span_ns, rng.poisson(rate * span_ns / 1e9)))
+
+# Function to draw two-state Markov-modulated Poisson arrival offsets (ns) within [0, span_ns)
+def mmpp_arrivals(rng, rates, mean_dwell, span_ns):
+    """
+    The chain starts in its stationary distribution. Sojourn times are
+    exponential; each sojourn gets a Poisson number of arrivals at its state's
+    rate, placed uniformly inside it.
+    """
+    state = int(rng.random() < mean_dwell[1] / sum(mean_dwell))
+    dwell_ns = np.asarray(mean_dwell) * 1e9
+    sojourns = []
+    covered = 0.0
+    while covered < span_ns:
+        # Draw alternating sojourns in batches until the window is covered
+        batch = rng.exponential(dwell_ns[(state + np.arange(64)) % 2])
+        sojourns.append(batch)
+        covered += batch.sum()
+    lengths = np.concatenate(sojourns)
+    ends = np.minimum(np.cumsum(lengths), span_ns)
+    starts = np.concatenate([[0.0], ends[:-1]])
+    states = (state + np.arange(len(lengths))) % 2
+    lengths = ends - starts
+    counts = rng.poisson(np.asarray(rates)[states] * lengths / 1e9)
+    offsets = np.repeat(starts, counts) + rng.random(counts.sum()) * np.repeat(lengths, counts)
+    return np.sort(offsets.astype(np.int64))
+
+# Function to draw periodic-with-jitter arrivals (ns) for window [start_ns, end_ns) of the trace
+def periodic_arrivals(rng, phases_ns, period_ns, jitter_ns, start_ns, end_ns):
+    """
+    Device d reports at phases_ns[d] + k * period_ns (relative to the trace
+    start), so the schedule lines up across chunks. Jitter is added per report
+    and clipped to the window.
+    """
+    first = -(-(start_ns - phases_ns) // period_ns)
+    ticks = np.arange(int(-(-(end_ns - start_ns) // period_ns)) + 1)
+    times = phases_ns[:, None] + (first[:, None] + ticks[None, :]) * period_ns
+    times = times[(times >= start_ns) & (times < end_ns)]
+    jittered = times + rng.normal(0, jitter_ns, len(times)).astype(np.int64)
+    return np.sort(np.clip(jittered, start_ns, end_ns - 1))
+
+# Function to generate one time window of traffic from the per-QoS arrival models
+def generate_model_columns(rng, plan):
+    """
+    uRLLC is periodic with jitter, eMBB is a bursty MMPP and mMTC is Poisson,
+    each scaled by plan["load"]; eMBB and mMTC follow the diurnal curve. The
+    classes are merged in timestamp order at microsecond resolution.
+    """
+    load = plan["load"]
+    window_start, window_end = plan["window_start_ns"], plan["window_end_ns"]
+    span = window_end - window_start
+    peak = 1 + plan["diurnal_amplitude"]
+
+    urllc = plan["trace_start_ns"] + periodic_arrivals(
+        rng, plan["phases_ns"], int(URLLC_PERIOD / load * 1e9), int(URLLC_JITTER * 1e9),
+        window_start - plan["trace_start_ns"], window_end - plan["trace_start_ns"])
+    embb = window_start + mmpp_arrivals(rng, np.multiply(EMBB_RATES, load * peak), EMBB_DWELL, span)
+    mmtc = window_start + poisson_arrivals(rng, MMTC_RATE * load * peak, span)
+    if plan["diurnal_amplitude"]:
+        embb = embb[diurnal_keep(rng, embb, plan["diurnal_amplitude"], plan["peak_hour"])]
+        mmtc = mmtc[diurnal_keep(rng, mmtc, plan["diurnal_amplitude"], plan["peak_hour"])]
+
+    timestamps = np.concatenate([urllc, embb, mmtc])
+    qos_class = np.repeat(np.arange(len(QOS_CLASSES)), [len(urllc), len(embb), len(mmtc)])
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order]
+    return generate_packet_columns(rng, timestamps - timestamps % 1000, qos_class[order])
+
+# Function to format a column by formatting each distinct value only once
+def format_distinct(values, format_value):
+    distinct, inverse = np.unique(values, return_inverse=True)
+    return np.array([format_value(value) for value in distinct.tolist()], dtype=object)[inverse]
+
+def format_ip(value):
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+def format_timestamp(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+# Function to format a timestamp column, with microseconds only when they are used
+def format_timestamps(timestamps):
+    fraction = timestamps % 1_000_000_000
+    seconds = format_distinct(timestamps - fraction, format_timestamp)
+    if not fraction.any():
+        return seconds
+    return seconds + "." + pd.Series(fraction // 1000).astype(str).str.zfill(6).to_numpy(dtype=object)
+
+# Function to render a chunk of columns as CSV text (without header)
+def columns_to_csv(columns):
+    lines = (format_timestamps(columns["timestamp"]) + ","
+             + format_distinct(columns["source_ip"], format_ip) + ","
+             + format_distinct(columns["destination_ip"], format_ip) + ","
+             + PROTOCOLS[columns["protocol"]] + ","
+             + SIZES[columns["packet_size"]] + ","
+             + QOS_CLASSES[columns["qos_class"]])
+    return "\n".join(lines.tolist()) + "\n"
+
+# Function to split num_entries rows into chunks, each with its own time window and seed
+def plan_chunks(num_entries, chunk_size, start_ns, seed):
+    """
+    Each chunk gets an independent child of the root SeedSequence, keyed by the
+    chunk index, so the output for a given seed does not depend on how many
+    worker processes generate it.
+    """
+    duration_ns = DURATION * 1_000_000_000
+    if seed is None:
+        seed = np.random.SeedSequence().entropy  # Fresh, but shared by every chunk of this run
+    plans = []
+    for index, first in enumerate(range(0, num_entries, chunk_size)):
+        rows = min(chunk_size, num_entries - first)
+        plans.append({
+            "model": "uniform",
+            "seed": np.random.SeedSequence(seed, spawn_key=(index,)),
+            "rows": rows,
+            "window_start_ns": start_ns + duration_ns * first // num_entries,
+            "window_end_ns": start_ns + duration_ns * (first + rows) // num_entries,
         })
+    return plans
 
-    return data
+# Function to split a trace generated from arrival models into fixed time windows
+def plan_model_chunks(duration, chunk_seconds, start_ns, seed, load=1.0, diurnal_amplitude=0.0, peak_hour=20.0):
+    """
+    Like plan_chunks, but chunks are time windows and their row counts come
+    out of the arrival models. The uRLLC device phases are drawn once for the
+    whole trace. Each window's MMPP starts from the stationary distribution.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    phase_rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(PHASE_SEED_KEY,)))
+    phases_ns = phase_rng.integers(0, int(URLLC_PERIOD / load * 1e9), URLLC_DEVICES)
+    duration_ns = int(duration * 1e9)
+    chunk_ns = int(chunk_seconds * 1e9)
+    return [{
+        "model": "models",
+        "seed": np.random.SeedSequence(seed, spawn_key=(index,)),
+        "trace_start_ns": start_ns,
+        "window_start_ns": start_ns + offset,
+        "window_end_ns": start_ns + min(offset + chunk_ns, duration_ns),
+        "phases_ns": phases_ns,
+        "load": load,
+        "diurnal_amplitude": diurnal_amplitude,
+        "peak_hour": peak_hour,
+    } for index, offset in enumerate(range(0, duration_ns, chunk_ns))]
 
-# Function to save the generated data to a CSV file
-def save_to_csv(data, filename):
+def _generate_chunk(plan):
+    rng = np.random.default_rng(plan["seed"])
+    if plan["model"] == "models":
+        return generate_model_columns(rng, plan)
+    return generate_columns(rng, plan["rows"], plan["window_start_ns"], plan["window_end_ns"])
+
+def _csv_chunk(plan):
+    columns = _generate_chunk(plan)
+    return len(columns["timestamp"]), columns_to_csv(columns)
+
+# Function to run a job over every chunk plan and yield the results in order
+def iter_chunk_results(job, plans, workers=1):
+    if workers == 1:
+        yield from map(job, plans)
+        return
+    # Only a few chunks are in flight at a time, so memory stays bounded
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for plan in plans:
+            pending.append(pool.submit(job, plan))
+            if len(pending) > 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+# Function to write a generated trace as CSV, chunk by chunk
+def save_to_csv(plans, filename, workers=1):
+    rows = 0
     with open(filename, mode='w', newline='') as file:
-        fieldnames = ["Timestamp", "Source IP", "Destination IP", "Protocol", "Packet Size (Bytes)", "QoS Class"]
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        file.write(",".join(CSV_COLUMNS) + "\n")
+        for count, text in iter_chunk_results(_csv_chunk, plans, workers):
+            file.write(text)
+            rows += count
+    return rows
+
+# Function to write a version 1.0 .npy header of exactly NPY_HEADER_SIZE bytes
+def write_npy_header(file, dtype, rows):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, rows)
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
 
-        writer.writeheader()
-        for row in data:
-            writer.writerow(row)
+# Function to write a generated trace as a directory of .npy column files
+def save_to_binary(plans, directory, workers=1):
+    """
+    Compact columnar format: one fixed-width .npy file per column (see
+    BINARY_COLUMNS), opened without parsing by trace_format.open_columns.
+    Chunks are appended as they arrive and the row count is written last.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {name: open(os.path.join(directory, f"{name}.npy"), "wb") for name in BINARY_COLUMNS}
+    rows = 0
+    try:
+        for name, file in files.items():
+            write_npy_header(file, BINARY_COLUMNS[name], 0)
+        for columns in iter_chunk_results(_generate_chunk, plans, workers):
+            for name, file in files.items():
+                file.write(np.ascontiguousarray(columns[name], dtype=BINARY_COLUMNS[name]).tobytes())
+            rows += len(columns["timestamp"])
+        for name, file in files.items():
+            file.seek(0)
+            write_npy_header(file, BINARY_COLUMNS[name], rows)
+    finally:
+        for file in files.values():
+            file.close()
+    return rows
+
+# Function to write a generated trace as one memory-mappable trace file (see trace_format.py)
+def save_to_trace(plans, filename, workers=1):
+    return write_trace(filename, map(pack_records, iter_chunk_results(_generate_chunk, plans, workers)))
 
 # Main function to generate and save the dataset
 def main():
-    num_entries = int(input("Enter the number of entries to generate: "))
-    traffic_data = generate_random_traffic_data(num_entries)
-    save_to_csv(traffic_data, "5g_network_traffic.csv")
-    print(f"Generated {num_entries} entries and saved to 5g_network_traffic.csv.")
+    parser = argparse.ArgumentParser(description="Generate synthetic 5G network traffic.")
+    parser.add_argument("--entries", type=int, default=100000, help="number of rows to generate")
+    parser.add_argument("--output", default=None,
+                        help="output path (default: 5g_network_traffic.csv, .trace, or 5g_network_traffic/ for npy)")
+    parser.add_argument("--format", choices=["csv", "npy", "trace"], default="csv",
+                        help="CSV text, a directory of binary .npy columns, or one binary trace file")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("--start", default=None,
+                        help="first timestamp, 'YYYY-MM-DD HH:MM:SS' (default: now; fix it for reproducible output)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per generated chunk")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--arrivals", choices=["uniform", "models"], default="uniform",
+                        help="uniform timestamps, or per-QoS arrival models (periodic uRLLC, MMPP eMBB, Poisson mMTC)")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds of traffic for --arrivals models")
+    parser.add_argument("--load", type=float, default=1.0, help="traffic load multiplier for --arrivals models")
+    parser.add_argument("--diurnal-amplitude", type=float, default=0.0,
+                        help="daily load swing (0 to 1) applied to eMBB and mMTC for --arrivals models")
+    parser.add_argument("--peak-hour", type=float, default=20.0, help="hour of day with the highest load")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d %H:%M:%S") if args.start else datetime.now().replace(microsecond=0)
+    start_ns = pd.Timestamp(start).as_unit("ns").value
+    if args.arrivals == "models":
+        plans = plan_model_chunks(args.duration, CHUNK_SECONDS, start_ns, args.seed, args.load,
+                                  args.diurnal_amplitude, args.peak_hour)
+    else:
+        plans = plan_chunks(args.entries, args.chunk_size, start_ns, args.seed)
+
+    if args.format == "csv":
+        output = args.output or "5g_network_traffic.csv"
+        rows = save_to_csv(plans, output, args.workers)
+    elif args.format == "trace":
+        output = args.output or "5g_network_traffic.trace"
+        rows = save_to_trace(plans, output, args.workers)
+    else:
+        output = args.output or "5g_network_traffic"
+        rows = save_to_binary(plans, output, args.workers)
+    print(f"Generated {rows} entries and saved to {output}.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,270 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# The generator, the CP scheduler and the hybrid scheduler live in subdirectories
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for directory in ("Dataset", "CPScheduler", "Automated"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+import dataset
+from latency import QUANTILES, LatencyHistogram
+from log_sink import AsyncLogSink
+from scheduler import QOS_CLASSES, PacketChunkReader, Scheduler, load_packets_from_csv
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+SEED = 42
+START = "2024-10-16 17:00:00"  # Fixed first timestamp, so traces are identical on every machine
+DATA_DIR = "benchmark_data"
+CP_FRAMES = 12  # Five-minute frames covering the generated hour
+MAX_OBJECT_ROWS = 1_000_000  # The hybrid scheduler builds one Packet object per row; larger traces are skipped
+DEFAULT_TOLERANCE = 0.10     # Relative change that counts as a regression
+MIN_COMPARED_SECONDS = 0.05  # Load times below this in both runs are timer noise and not compared
+
+# Metrics compared against a baseline: name -> True if higher is better
+COMPARED_METRICS = {"packets_per_second": True, "load_seconds": False, "peak_rss_mb": False,
+                    "frame_latency_p99_ms": False}
+
+# Scheduler that also times every scheduling pass (one slot = one frame)
+class TimedScheduler(Scheduler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slot_times = LatencyHistogram()
+
+    def process_slot(self):
+        start = time.perf_counter_ns()
+        super().process_slot()
+        self.slot_times.record(time.perf_counter_ns() - start)
+
+# Function to summarize a histogram of per-frame times in milliseconds
+def frame_latency(histogram):
+    return {f"frame_latency_p{q * 100:g}_ms": histogram.value_at_quantile(q) / 1e6 for q in QUANTILES}
+
+# Function to generate (or reuse) the seeded CSV and binary trace of one size
+def prepare_trace(rows, seed, data_dir, workers=1):
+    os.makedirs(data_dir, exist_ok=True)
+    base = os.path.join(data_dir, f"traffic_{rows}_{seed}")
+    start_ns = pd.Timestamp(START).as_unit("ns").value
+    if not os.path.exists(base + ".csv"):
+        dataset.save_to_csv(dataset.plan_chunks(rows, dataset.DEFAULT_CHUNK_SIZE, start_ns, seed),
+                            base + ".csv", workers)
+    if not os.path.exists(base + ".trace"):
+        dataset.save_to_trace(dataset.plan_chunks(rows, dataset.DEFAULT_CHUNK_SIZE, start_ns, seed),
+                              base + ".trace", workers)
+    return base + ".csv", base + ".trace"
+
+def bench_scheduler(path, discipline="priority"):
+    start = time.perf_counter()
+    table = load_packets_from_csv(path)
+    load_seconds = time.perf_counter() - start
+
+    scheduler = TimedScheduler(log_sink=AsyncLogSink(None, quiet=True), discipline=discipline)
+    start = time.perf_counter()
+    scheduler.add_packet(table)
+    scheduler.run()
+    elapsed = time.perf_counter() - start
+    packets = int(scheduler.processed_counts.sum() + scheduler.dropped_counts.sum())
+    return {"load_seconds": load_seconds, "schedule_seconds": elapsed, "packets": packets,
+            **frame_latency(scheduler.slot_times)}
+
+def bench_scheduler_stream(path):
+    # Reading and scheduling are interleaved, so there is no separate load time
+    scheduler = TimedScheduler(log_sink=AsyncLogSink(None, quiet=True))
+    start = time.perf_counter()
+    scheduler.process_stream(PacketChunkReader(path))
+    elapsed = time.perf_counter() - start
+    packets = int(scheduler.processed_counts.sum() + scheduler.dropped_counts.sum())
+    return {"load_seconds": None, "schedule_seconds": elapsed, "packets": packets,
+            **frame_latency(scheduler.slot_times)}
+
+def bench_cpscheduler(path, frames):
+    from cpshed import CPScheduler
+
+    start = time.perf_counter()
+    scheduler = CPScheduler(50, 2, 0.1, 0.05, path)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = scheduler.cp_based_scheduler(frames, verbose=False)
+    elapsed = time.perf_counter() - start
+    packets = int(sum(results[f"predicted_{name.lower()}"].sum() for name in QOS_CLASSES))
+    # Frames are scheduled in one vectorized pass, so only the mean per frame is known
+    per_frame = elapsed / frames * 1e3
+    return {"load_seconds": load_seconds, "schedule_seconds": elapsed, "packets": packets,
+            **{f"frame_latency_p{q * 100:g}_ms": per_frame for q in QUANTILES}}
+
+def bench_cpscheduler_stream(path):
+    from cpshed import CPScheduler
+
+    scheduler = CPScheduler(50, 2, 0.1, 0.05, path, streaming=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler.cp_based_scheduler_stream()
+    elapsed = time.perf_counter() - start
+    per_frame = elapsed / max(scheduler.frames_scheduled, 1) * 1e3
+    return {"load_seconds": None, "schedule_seconds": elapsed, "packets": None,
+            **{f"frame_latency_p{q * 100:g}_ms": per_frame for q in QUANTILES}}
+
+def bench_hybrid(path):
+    # Replay the CSV through the object-per-packet hybrid scheduler on a virtual clock
+    import hybrid_scheduler
+
+    start = time.perf_counter()
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        next(reader)
+        packets = []
+        for timestamp, source_ip, destination_ip, protocol, packet_size, qos_class in reader:
+            arrival = datetime.fromisoformat(timestamp)
+            packets.append(hybrid_scheduler.Packet(timestamp, source_ip, destination_ip, protocol, packet_size,
+                                                   qos_class, arrival_time=arrival))
+    load_seconds = time.perf_counter() - start
+
+    scheduler = hybrid_scheduler.Scheduler(AsyncLogSink(None, quiet=True))
+    slot_times = LatencyHistogram()
+    slot = timedelta(seconds=hybrid_scheduler.TIME_SLOT)
+    start = time.perf_counter()
+    now = packets[0].arrival_time if packets else None
+    index = 0
+    while index < len(packets):
+        now += slot
+        while index < len(packets) and packets[index].arrival_time <= now:
+            scheduler.add_packet(packets[index])
+            index += 1
+        slot_start = time.perf_counter_ns()
+        scheduler.process_slot(now)
+        slot_times.record(time.perf_counter_ns() - slot_start)
+    elapsed = time.perf_counter() - start
+    return {"load_seconds": load_seconds, "schedule_seconds": elapsed, "packets": len(packets),
+            **frame_latency(slot_times)}
+
+# Benchmark cases: name -> (input format, function of (path, args))
+CASES = {
+    "scheduler-csv": ("csv", lambda path, args: bench_scheduler(path)),
+    "scheduler-trace": ("trace", lambda path, args: bench_scheduler(path)),
+    "scheduler-edf-trace": ("trace", lambda path, args: bench_scheduler(path, "edf")),
+    "scheduler-wfq-trace": ("trace", lambda path, args: bench_scheduler(path, "wfq")),
+    "scheduler-stream-csv": ("csv", lambda path, args: bench_scheduler_stream(path)),
+    "cpscheduler-csv": ("csv", lambda path, args: bench_cpscheduler(path, args.frames)),
+    "cpscheduler-trace": ("trace", lambda path, args: bench_cpscheduler(path, args.frames)),
+    "cpscheduler-stream-csv": ("csv", lambda path, args: bench_cpscheduler_stream(path)),
+    "hybrid-csv": ("csv", lambda path, args: bench_hybrid(path)),
+}
+
+# Function to run one case; executed in a fresh process so peak RSS belongs to the case alone
+def run_case(name, rows, path, args):
+    result = CASES[name][1](path, args)
+    packets = result["packets"] if result["packets"] is not None else rows
+    result.update({
+        "case": name,
+        "rows": rows,
+        "packets_per_second": packets / result["schedule_seconds"] if result["schedule_seconds"] else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # ru_maxrss is in KiB on Linux
+    })
+    return result
+
+# Function to describe the machine and code version a result file came from
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+# Function to compare results with a baseline run; returns (case, rows, metric, old, new, change, regressed) rows
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    previous = {(entry["case"], entry["rows"]): entry for entry in baseline["results"]}
+    rows = []
+    for entry in results:
+        old_entry = previous.get((entry["case"], entry["rows"]))
+        if old_entry is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = old_entry.get(metric), entry.get(metric)
+            if not old or new is None:
+                continue
+            if metric == "load_seconds" and max(old, new) < MIN_COMPARED_SECONDS:
+                continue
+            change = new / old - 1
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append((entry["case"], entry["rows"], metric, old, new, change, regressed))
+    return rows
+
+def print_header():
+    print(f"{'case':<24}{'rows':>11}{'load s':>9}{'pkt/s':>14}{'p50 ms':>9}{'p99 ms':>9}{'p99.9 ms':>10}{'RSS MB':>9}")
+
+def print_result(entry):
+    load = f"{entry['load_seconds']:.2f}" if entry["load_seconds"] is not None else "-"
+    print(f"{entry['case']:<24}{entry['rows']:>11,}{load:>9}{entry['packets_per_second']:>14,.0f}"
+          f"{entry['frame_latency_p50_ms']:>9.3f}{entry['frame_latency_p99_ms']:>9.3f}"
+          f"{entry['frame_latency_p99.9_ms']:>10.3f}{entry['peak_rss_mb']:>9.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput, latency and memory benchmarks for the schedulers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="trace sizes in rows")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="benchmark cases to run")
+    parser.add_argument("--seed", type=int, default=SEED, help="seed of the generated traces")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated traces are cached")
+    parser.add_argument("--frames", type=int, default=CP_FRAMES, help="frames scheduled by the CPScheduler cases")
+    parser.add_argument("--max-object-rows", type=int, default=MAX_OBJECT_ROWS,
+                        help="largest trace given to the object-per-packet hybrid scheduler")
+    parser.add_argument("--workers", type=int, default=1, help="processes used to generate traces")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change that counts as a regression")
+    args = parser.parse_args()
+
+    results = []
+    print_header()
+    # A fresh spawned process per case keeps peak RSS and imports independent between cases
+    context = multiprocessing.get_context("spawn")
+    for rows in args.sizes:
+        csv_path, trace_path = prepare_trace(rows, args.seed, args.data_dir, args.workers)
+        for name in args.cases:
+            if name.startswith("hybrid") and rows > args.max_object_rows:
+                continue
+            path = trace_path if CASES[name][0] == "trace" else csv_path
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(pool.submit(run_case, name, rows, path, args).result())
+            print_result(results[-1])
+
+    with open(args.output, "w") as file:
+        json.dump({"environment": environment(), "seed": args.seed, "results": results}, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        comparison = compare(results, baseline, args.tolerance)
+        print(f"\nComparison with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for case, rows, metric, old, new, change, regressed in comparison:
+            flag = "REGRESSION" if regressed else ""
+            print(f"{case:<24}{rows:>11,}  {metric:<22}{old:>14.4g} -> {new:<14.4g}{change:>+8.1%}  {flag}")
+        if any(entry[-1] for entry in comparison):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
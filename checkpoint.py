@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+CHECKPOINT_INTERVAL = 60.0  # Seconds between periodic checkpoints
+
+# Function to write a checkpoint (a mapping of names to arrays) atomically
+def write_checkpoint(filename, state):
+    """
+    The arrays are written uncompressed to a temporary file which then replaces
+    the previous checkpoint, so a crash while writing never leaves a partial
+    checkpoint behind. Only plain arrays are stored (no pickles).
+    """
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez(file, **state)
+    os.replace(temporary, filename)
+
+# Function to read a checkpoint back into a dict of arrays
+def read_checkpoint(filename):
+    with np.load(filename, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+# Function to check that a checkpoint was written by the kind of run that resumes it
+def check_mode(state, mode):
+    saved = str(state["mode"]) if "mode" in state else "unknown"
+    if saved != mode:
+        raise ValueError(f"Checkpoint was written by a {saved} run and cannot be resumed by a {mode} run")
+
+# Function to check that a run resumes with the settings its checkpoint was written with
+def check_settings(state, settings):
+    changed = []
+    for name, value in settings.items():
+        saved = state.get(f"settings.{name}")
+        if saved is None or not np.array_equal(saved, value):
+            changed.append(f"{name} {'unknown' if saved is None else saved} (now {np.asarray(value)})")
+    if changed:
+        raise ValueError("Checkpoint was written with different settings: " + ", ".join(changed))
+
+# Function to capture the array and scalar attributes of an object (e.g. a predictor)
+def object_state(obj, prefix):
+    # Copies, not views: the object keeps updating its arrays in place while the writer thread saves them
+    return {f"{prefix}.{name}": np.array(value, copy=True) for name, value in vars(obj).items()
+            if isinstance(value, (np.ndarray, int, float, bool, np.number))}
+
+# Function to restore attributes captured by object_state
+def restore_object(obj, state, prefix):
+    for key, value in state.items():
+        if key.startswith(prefix + "."):
+            setattr(obj, key[len(prefix) + 1:], value.item() if value.ndim == 0 else value.copy())
+
+# Periodic checkpoints written by a background thread
+class Checkpointer:
+    """
+    The simulation calls due() from its loop (one clock read) and, when it
+    returns True, save() with a snapshot of its state. The snapshot must be a
+    copy; serializing and writing it happens on the writer thread. If the
+    previous checkpoint is still being written, the older pending snapshot is
+    replaced by the newer one, so the loop never waits on the disk.
+    """
+    def __init__(self, filename, interval=CHECKPOINT_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.next_save = time.monotonic() + interval
+        self.pending = None
+        self.condition = threading.Condition()
+        self.closed = False
+        self.written = 0
+        self.replaced = 0  # Snapshots superseded before they were written
+        self.writer = threading.Thread(target=self.drain, name="checkpoint-writer", daemon=True)
+        self.writer.start()
+
+    def due(self):
+        return time.monotonic() >= self.next_save
+
+    def save(self, state):
+        self.next_save = time.monotonic() + self.interval
+        with self.condition:
+            if self.pending is not None:
+                self.replaced += 1
+            self.pending = state
+            self.condition.notify()
+
+    def drain(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    break
+                state, self.pending = self.pending, None
+            write_checkpoint(self.filename, state)
+            self.written += 1
+
+    def close(self, state=None):
+        # Write a final snapshot (if given) and everything still pending, then stop the writer
+        if state is not None:
+            self.save(state)
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.writer.join()
@@ -0,0 +1,124 @@
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+from log_sink import BLOCK, AsyncLogSink
+
+# Event log layout: a fixed HEADER_SIZE-byte header followed by fixed-width
+# records of EVENT_DTYPE, appended until the log is closed (no record count, so
+# a log can be read while it is still being written)
+MAGIC = b"5GEVLOG\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHH")  # magic, version, record size
+HEADER_SIZE = 64
+EVENT_SUFFIX = ".events"
+
+# Event types (index = code)
+EVENT_TYPES = ("Generated", "Processed", "Dropped")
+GENERATED, PROCESSED, DROPPED = range(len(EVENT_TYPES))
+QOS_NAMES = ("uRLLC", "eMBB", "mMTC")  # Same codes as scheduler.QOS_CLASSES
+
+EVENT_DTYPE = np.dtype([
+    ("timestamp", "<i8"),       # Epoch nanoseconds of the event
+    ("delay", "<i8"),           # Queueing delay in nanoseconds (event time - arrival time)
+    ("source_ip", "<u4"),
+    ("destination_ip", "<u4"),
+    ("packet_size", "<u2"),
+    ("event", "u1"),            # Index into EVENT_TYPES
+    ("qos_class", "u1"),        # Index into QOS_NAMES
+])
+
+# Function to build one event record from plain values (dotted-quad IPs)
+def event_record(timestamp, event, qos_class, source_ip, destination_ip, packet_size, delay=0):
+    return (timestamp, delay, int.from_bytes(bytes(map(int, source_ip.split("."))), "big"),
+            int.from_bytes(bytes(map(int, destination_ip.split("."))), "big"), packet_size, event, qos_class)
+
+# Function to build event records for a whole scheduler.PacketTable at once
+def table_records(event, qos_class, now, table):
+    records = np.empty(len(table), dtype=EVENT_DTYPE)
+    records["timestamp"] = now
+    records["delay"] = now - table.timestamp
+    records["source_ip"] = table.source_ip
+    records["destination_ip"] = table.destination_ip
+    records["packet_size"] = table.packet_size
+    records["event"] = event
+    records["qos_class"] = qos_class
+    return records
+
+# Asynchronous sink for binary event records
+class EventLogSink(AsyncLogSink):
+    """
+    Same bounded buffer and writer thread as AsyncLogSink, but a record is an
+    EVENT_DTYPE array, a record tuple or a list of them (or a callable plus
+    arguments that returns one of those), and the writer appends them as raw
+    bytes. Nothing is formatted as text on either side.
+    """
+    def __init__(self, filename, capacity=65536, policy=BLOCK, batch_size=4096, flush_interval=0.1, mode="wb"):
+        super().__init__(filename, capacity, policy, batch_size, flush_interval, mode=mode)
+
+    def open_file(self, filename, mode):
+        file = open(filename, mode)
+        if file.tell() == 0:
+            file.write(HEADER.pack(MAGIC, VERSION, EVENT_DTYPE.itemsize).ljust(HEADER_SIZE, b"\0"))
+        return file
+
+    def write_batch(self, batch):
+        blocks = []
+        rows = []  # Consecutive single records, packed together
+        for _, message, args in batch:
+            value = message(*args) if callable(message) else message
+            if isinstance(value, np.ndarray):
+                if rows:
+                    blocks.append(np.array(rows, dtype=EVENT_DTYPE))
+                    rows = []
+                blocks.append(value)
+            elif isinstance(value, list):
+                rows.extend(value)
+            else:
+                rows.append(value)
+        if rows:
+            blocks.append(np.array(rows, dtype=EVENT_DTYPE))
+        self.file.write(b"".join(np.ascontiguousarray(block, dtype=EVENT_DTYPE).tobytes() for block in blocks))
+
+# Function to tell an event log from a text log by its magic bytes
+def is_event_log(filename):
+    if not os.path.isfile(filename):
+        return False
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+# Function to open an event log as a read-only memory map of its complete records
+def open_event_log(filename):
+    with open(filename, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError(f"{filename!r} is not an event log")
+    _, version, record_size = HEADER.unpack_from(header)
+    if version != VERSION or record_size != EVENT_DTYPE.itemsize:
+        raise ValueError(f"Unsupported event log version {version} (record size {record_size})")
+    # A record still being written at the end is left out
+    count = (os.path.getsize(filename) - HEADER_SIZE) // EVENT_DTYPE.itemsize
+    if not count:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    return np.memmap(filename, dtype=EVENT_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+# Function to format uint32 addresses, each distinct address only once
+def format_ips(values):
+    distinct, inverse = np.unique(values, return_inverse=True)
+    names = np.array([f"{v >> 24}.{(v >> 16) & 255}.{(v >> 8) & 255}.{v & 255}" for v in distinct.tolist()],
+                     dtype=object)
+    return names[inverse]
+
+# Function to turn event records into a DataFrame for analysis
+def events_to_frame(records):
+    return pd.DataFrame({
+        "Timestamp": records["timestamp"].astype("datetime64[ns]"),
+        "Event": pd.Categorical.from_codes(records["event"], EVENT_TYPES),
+        "QoS Class": pd.Categorical.from_codes(records["qos_class"], QOS_NAMES),
+        "Source IP": format_ips(records["source_ip"]),
+        "Destination IP": format_ips(records["destination_ip"]),
+        "Packet Size (Bytes)": records["packet_size"],
+        "Queueing Delay (ms)": records["delay"] / 1e6,
+    })
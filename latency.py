@@ -0,0 +1,234 @@
+import time
+
+import numpy as np
+
+# Histogram resolution: values below 2**SUB_BUCKET_BITS ns are exact, larger ones
+# fall into log-linear buckets 2**-(SUB_BUCKET_BITS - 1) wide (under 1.6% relative error)
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+MAX_LATENCY_NS = 1 << 42  # About 73 minutes; larger values are clamped
+
+QUANTILES = (0.5, 0.99, 0.999)
+REPORT_INTERVAL = 5.0   # Seconds between periodic snapshots
+OVERHEAD_BUDGET = 0.01  # Instrumentation may take up to 1% of wall time
+PENDING_LIMIT = 8192    # Values buffered before they are binned in one NumPy call
+INT64 = np.dtype(np.int64)
+
+# Function to map nanosecond values to histogram bucket indices (scalar)
+def bucket_index(value):
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (value >> shift) - HALF_BUCKETS
+
+# Function to map arrays of nanosecond values to bucket indices
+def bucket_indices(values):
+    values = np.asarray(values, dtype=np.int64)
+    # frexp's exponent is the bit length for every value below 2**53
+    shift = np.maximum(np.frexp(values.astype(np.float64))[1] - SUB_BUCKET_BITS, 0)
+    return np.where(shift == 0, values,
+                    SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (values >> shift) - HALF_BUCKETS)
+
+# Function to get the highest value that falls into a bucket
+def bucket_upper_bound(index):
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    return ((HALF_BUCKETS + offset + 1) << (shift + 1)) - 1
+
+# HDR-style histogram of latencies in nanoseconds
+class LatencyHistogram:
+    """
+    Fixed array of log-linear buckets, so recording is an index computation and
+    an increment with no allocation, and quantiles are read from a cumulative
+    sum. Single values and small arrays are buffered and binned in batches.
+    Quantiles are reported as the upper bound of their bucket, so they never
+    understate a latency.
+    """
+    def __init__(self, max_value=MAX_LATENCY_NS):
+        self.max_value = max_value
+        self.counts = np.zeros(bucket_index(max_value) + 1, dtype=np.int64)
+        self.total = 0
+        self.max = 0
+        self.pending = []         # Single values
+        self.pending_arrays = []  # Arrays of values
+        self.pending_size = 0
+        self.weighted = []        # Values recorded with a count...
+        self.weights = []         # ...and their counts
+
+    def record(self, value, count=1):
+        if count == 1:
+            self.pending.append(value)
+            self.pending_size += 1
+            if self.pending_size >= PENDING_LIMIT:
+                self.flush()
+            return
+        self.weighted.append(value)
+        self.weights.append(count)
+        if len(self.weighted) >= PENDING_LIMIT:
+            self.flush()
+
+    def flush(self):
+        if self.pending_size:
+            values = np.concatenate(self.pending_arrays + [np.array(self.pending, dtype=np.int64)])
+            self.pending, self.pending_arrays, self.pending_size = [], [], 0
+            self.bin(values)
+        if self.weighted:
+            values, weights = self.weighted, self.weights
+            self.weighted, self.weights = [], []
+            self.record_counts(values, weights)
+
+    def record_counts(self, values, counts):
+        # Bin each value counts times, in one NumPy call
+        counts = np.asarray(counts, dtype=np.int64)
+        values = np.clip(np.asarray(values, dtype=np.int64)[counts > 0], 0, self.max_value)
+        counts = counts[counts > 0]
+        if len(values):
+            self.counts += np.bincount(bucket_indices(values), counts, minlength=len(self.counts)).astype(np.int64)
+            self.total += int(counts.sum())
+            self.max = max(self.max, int(values.max()))
+
+    def record_many(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        if len(values) < PENDING_LIMIT:
+            # Small batches are binned together with the buffered values
+            self.pending_arrays.append(values)
+            self.pending_size += len(values)
+            if self.pending_size >= PENDING_LIMIT:
+                self.flush()
+            return
+        self.bin(values)
+
+    def bin(self, values):
+        values = np.clip(values, 0, self.max_value)
+        self.counts += np.bincount(bucket_indices(values), minlength=len(self.counts))
+        self.total += len(values)
+        self.max = max(self.max, int(values.max()))
+
+    def value_at_quantile(self, quantile):
+        self.flush()
+        if not self.total:
+            return 0
+        rank = max(int(np.ceil(quantile * self.total)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(bucket_upper_bound(index), self.max)
+
+    def merge(self, other):
+        self.flush()
+        other.flush()
+        self.counts += other.counts
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+# Per-QoS queueing and service latency, with periodic snapshots
+class LatencyRecorder:
+    """
+    Queueing latency is the time from enqueue to the start of the scheduling
+    pass that serves a packet; service latency is the time from the start of
+    that pass until the packet has been handed off. The recorder also counts the
+    packets of threshold_class whose total latency exceeds threshold, and the
+    time spent inside its own record calls, which snapshots report against
+    budget (a fraction of wall time). The budget only means something when the
+    run is paced by the wall clock: an offline replay does nothing but schedule
+    and record, so its instrumentation share is far higher; such runs pass
+    budget=None and get the overhead without a verdict.
+    """
+    def __init__(self, classes, threshold, threshold_class=0, report_interval=REPORT_INTERVAL, report=print,
+                 budget=OVERHEAD_BUDGET):
+        self.classes = classes
+        self.threshold_ns = int(threshold * 1e9)
+        self.threshold_class = threshold_class
+        self.queueing = [LatencyHistogram() for _ in classes]
+        self.service = [LatencyHistogram() for _ in classes]
+        self.over_threshold = 0
+        self.batches = [[] for _ in classes]   # Queueing arrays not yet binned, per class...
+        self.services = [[] for _ in classes]  # ...and the service latency of each
+        self.pending_packets = 0
+        self.report_interval = report_interval
+        self.report = report
+        self.budget = budget
+        self.overhead_ns = 0
+        self.record_calls = 0
+        self.started = time.perf_counter_ns()
+        self.next_report = time.monotonic() + report_interval if report_interval else None
+
+    def record_packets(self, code, queueing_ns, service_ns):
+        """
+        Record a batch of packets of one class: queueing_ns is an array or list
+        (or a single value) and service_ns applies to the whole batch. Batches
+        are only buffered here and binned together by flush; int64 arrays are
+        kept as they are, so the caller must not modify them afterwards.
+        """
+        begin = time.perf_counter_ns()
+        if type(queueing_ns) is not np.ndarray or queueing_ns.dtype is not INT64:
+            queueing_ns = np.array(queueing_ns, dtype=np.int64, ndmin=1)
+        self.batches[code].append(queueing_ns)
+        self.services[code].append(service_ns)
+        self.pending_packets += len(queueing_ns)
+        if self.pending_packets >= PENDING_LIMIT:
+            self.flush()
+        self.record_calls += 1
+        self.overhead_ns += time.perf_counter_ns() - begin
+
+    def flush(self):
+        # Bin the buffered batches of every class; the threshold class is also checked against threshold here
+        for code, batches, services in zip(range(len(self.classes)), self.batches, self.services):
+            if not batches:
+                continue
+            queueing = np.concatenate(batches)
+            sizes = np.fromiter(map(len, batches), dtype=np.int64, count=len(batches))
+            services = np.array(services, dtype=np.int64)
+            self.batches[code], self.services[code] = [], []
+            self.queueing[code].record_many(queueing)
+            self.service[code].record_counts(services, sizes)
+            if code == self.threshold_class:
+                total = queueing + np.repeat(services, sizes)
+                self.over_threshold += int(np.count_nonzero(total > self.threshold_ns))
+        self.pending_packets = 0
+
+    def tick(self):
+        # Cheap check from the scheduling loop; reports once per report_interval
+        if self.next_report is not None and time.monotonic() >= self.next_report:
+            self.next_report = time.monotonic() + self.report_interval
+            self.report_snapshot()
+
+    def report_snapshot(self):
+        self.report(self.format_snapshot(self.snapshot()))
+
+    def snapshot(self):
+        self.flush()
+        for histogram in self.queueing + self.service:
+            histogram.flush()
+        elapsed = max(time.perf_counter_ns() - self.started, 1)
+        threshold_total = self.queueing[self.threshold_class].total
+        return {
+            "classes": {
+                name: {
+                    "packets": queueing.total,
+                    "queueing_ms": [queueing.value_at_quantile(q) / 1e6 for q in QUANTILES],
+                    "service_ms": [service.value_at_quantile(q) / 1e6 for q in QUANTILES],
+                }
+                for name, queueing, service in zip(self.classes, self.queueing, self.service)
+            },
+            "over_threshold": self.over_threshold / threshold_total if threshold_total else 0.0,
+            "overhead": self.overhead_ns / elapsed,
+            "overhead_per_call_ns": self.overhead_ns / max(self.record_calls, 1),
+        }
+
+    def format_snapshot(self, snapshot):
+        labels = "/".join(f"p{q * 100:g}" for q in QUANTILES)
+        lines = [f"Latency snapshot ({labels}, ms):"]
+        for name, stats in snapshot["classes"].items():
+            queueing = "/".join(f"{value:.3f}" for value in stats["queueing_ms"])
+            service = "/".join(f"{value:.3f}" for value in stats["service_ms"])
+            lines.append(f"  {name}: {stats['packets']} packets, queueing {queueing}, service {service}")
+        lines.append(f"  {self.classes[self.threshold_class]} over {self.threshold_ns / 1e6:g} ms: "
+                     f"{snapshot['over_threshold']:.2%}")
+        overhead = (f"  Instrumentation overhead: {snapshot['overhead']:.3%} of wall time "
+                    f"({snapshot['overhead_per_call_ns']:.0f} ns per call)")
+        if self.budget is not None:
+            status = "within" if snapshot["overhead"] <= self.budget else "OVER"
+            overhead += f", {status} the {self.budget:.1%} budget"
+        lines.append(overhead)
+        return "\n".join(lines)
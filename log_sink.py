@@ -0,0 +1,107 @@
+import sys
+import threading
+import time
+from collections import deque
+
+# What emit does when the ring buffer is full
+BLOCK = "block"              # Wait for the writer thread (backpressure)
+DROP_NEWEST = "drop_newest"  # Discard the record being emitted
+DROP_OLDEST = "drop_oldest"  # Discard the oldest buffered record
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+# Asynchronous, bounded log sink
+class AsyncLogSink:
+    """
+    Log records go into a bounded ring buffer and a background writer thread
+    drains it in batches, so callers never wait on file or console I/O unless the
+    BLOCK policy applies backpressure. Records are formatted by the writer thread:
+    a record is either a plain message or a callable plus its arguments, which
+    may return several lines. In quiet mode nothing is buffered or formatted and
+    only the number of skipped records is counted.
+    """
+    def __init__(self, filename, capacity=65536, policy=BLOCK, batch_size=4096, flush_interval=0.1,
+                 echo=False, quiet=False, timestamps=False, mode="w"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown log policy {policy!r}; expected one of {POLICIES}")
+        self.filename = filename
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.echo = echo  # Also copy every batch to stdout
+        self.quiet = quiet
+        self.timestamps = timestamps  # Prefix lines with "YYYY-MM-DD HH:MM:SS - "
+        self.buffer = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.written = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.writer = None
+        if not quiet:
+            self.file = self.open_file(filename, mode)
+            self.writer = threading.Thread(target=self.drain, name="log-writer", daemon=True)
+            self.writer.start()
+
+    def emit(self, message, *args):
+        if self.quiet:
+            self.skipped += 1
+            return
+        record = (time.time() if self.timestamps else None, message, args)
+        with self.condition:
+            if len(self.buffer) >= self.capacity:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                if self.policy == DROP_OLDEST:
+                    self.buffer.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self.buffer) >= self.capacity and not self.closed:
+                        self.condition.wait()
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self.condition.notify_all()
+
+    def open_file(self, filename, mode):
+        return open(filename, mode)
+
+    def format_record(self, record):
+        created, message, args = record
+        text = message(*args) if callable(message) else message
+        if created is None:
+            return text
+        prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)) + " - "
+        return "\n".join(prefix + line for line in text.split("\n"))
+
+    def write_batch(self, batch):
+        text = "\n".join(self.format_record(record) for record in batch) + "\n"
+        self.file.write(text)
+        if self.echo:
+            sys.stdout.write(text)
+
+    def drain(self):
+        # Writer thread: swap out the whole buffer, then format and write it in one go
+        while True:
+            with self.condition:
+                while not self.buffer and not self.closed:
+                    self.condition.wait(self.flush_interval)
+                if not self.buffer and self.closed:
+                    break
+                batch, self.buffer = self.buffer, deque()
+                self.condition.notify_all()  # Wake producers blocked on a full buffer
+
+            self.write_batch(batch)
+            self.written += len(batch)
+        self.file.flush()
+
+    def close(self):
+        # Flush everything still buffered and stop the writer thread
+        if self.writer is None:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.writer.join()
+        self.writer = None
+        self.file.close()
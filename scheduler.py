@@ -1,24 +1,62 @@
-import csv
-import queue
+import argparse
+import heapq
+import io
+import itertools
 import random
+import sys
 import time
+from collections import deque
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
+from checkpoint import (CHECKPOINT_INTERVAL, Checkpointer, check_mode, check_settings, object_state, read_checkpoint,
+                        restore_object)
+from event_log import DROPPED, PROCESSED, EventLogSink, table_records
+from latency import OVERHEAD_BUDGET, REPORT_INTERVAL, LatencyRecorder
+from log_sink import BLOCK, POLICIES, AsyncLogSink
+from trace_format import (HEADER_SIZE, RECORD_DTYPE, is_column_directory, is_trace, open_columns, open_trace,
+                          pack_records)
+
 # Constants
 LATENCY_THRESHOLD_URLLC = 0.005  # 5 ms threshold for uRLLC packets
 TIME_SLOT = 0.1  # Scheduler time slot (100 ms)
 OUTPUT_FILE = "scheduler_output.txt"  # File to store output
+DEFAULT_CHUNK_SIZE = 100_000  # Rows per chunk when streaming a trace
+
+# Columns of the traffic CSV
+CSV_COLUMNS = ["Timestamp", "Source IP", "Destination IP", "Protocol", "Packet Size (Bytes)", "QoS Class"]
+
+# Small integer codes used by the columnar packet table (index = code)
+QOS_CLASSES = ("uRLLC", "eMBB", "mMTC")
+QOS_URLLC, QOS_EMBB, QOS_MMTC = range(len(QOS_CLASSES))
+PROTOCOLS = ("TCP", "UDP")
+PROTOCOL_UNKNOWN = 255
+
+# Per-class deadline offsets in nanoseconds; uRLLC packets have no deadline
+NO_DEADLINE = np.iinfo(np.int64).max
+UNSET_NS = np.iinfo(np.int64).min  # Stands for None in checkpointed clock values
+DEADLINE_NS = np.array([0, 200_000_000, 200_000_000], dtype=np.int64)  # 200 ms for eMBB and mMTC
+
+# Default per-class weights for weighted fair queueing
+WFQ_WEIGHTS = (4.0, 2.0, 1.0)
+
+# Event kinds; at equal times arrivals are handled before the slot that serves them
+ARRIVAL, SLOT = 0, 1
+CHECKPOINT_MODE = "scheduler"  # Stored in checkpoints so that other tools' checkpoints are rejected
+EPOCH = datetime(1970, 1, 1)
 
 # Class to represent a packet
 class Packet:
     def __init__(self, timestamp, source_ip, destination_ip, protocol, packet_size, qos_class):
-        self.timestamp = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        self.timestamp = datetime.fromisoformat(timestamp)
         self.source_ip = source_ip
         self.destination_ip = destination_ip
         self.protocol = protocol
         self.packet_size = int(packet_size)
         self.qos_class = qos_class
-        self.arrival_time = datetime.now()
+        self.arrival_time = self.timestamp  # Packets arrive at their trace timestamp
         self.deadline = self.calculate_deadline()
 
     def calculate_deadline(self):
@@ -30,93 +68,736 @@ class Packet:
             # Use a larger deadline for eMBB and mMTC packets
             return self.arrival_time + timedelta(seconds=0.2)  # 200 ms for eMBB
 
+# Function to convert a naive datetime to epoch nanoseconds
+def datetime_to_ns(value):
+    return (value - EPOCH) // timedelta(microseconds=1) * 1000
+
+# Function to convert dotted-quad IP strings to uint32
+def ip_to_uint32(ips):
+    # Addresses repeat heavily, so only the distinct ones are parsed and the rest is a lookup
+    codes, distinct = pd.factorize(pd.Series(ips))
+    if not len(distinct):
+        return np.zeros(len(codes), dtype=np.uint32)
+    octets = pd.Series(distinct).str.split(".", expand=True).astype(np.uint32).to_numpy()
+    return ((octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3])[codes]
+
+# Function to format a uint32 IP back to dotted-quad notation
+def uint32_to_ip(value):
+    value = int(value)
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+# Function to format one log line per packet; runs on the log writer thread
+def format_packet_lines(message, sources, destinations):
+    return "\n".join(f"{message}: {uint32_to_ip(src)} -> {uint32_to_ip(dst)}"
+                     for src, dst in zip(sources.tolist(), destinations.tolist()))
+
+# Function to map string labels onto their small integer codes
+def encode_labels(values, labels, default):
+    codes = pd.Categorical(values, categories=labels).codes.astype(np.int16)
+    codes[codes < 0] = default
+    return codes.astype(np.uint8)
+
+# Function to count the leading (sorted) timestamps at or before boundary
+def count_until(timestamps, boundary):
+    # Galloping search over a growing prefix: a long column, or a strided view of
+    # a memory-mapped trace, is not copied in full on every arrival
+    end = 1
+    while end < len(timestamps) and timestamps[end - 1] <= boundary:
+        end *= 2
+    return int(np.searchsorted(timestamps[:end], boundary, side="right"))
+
+# Columnar, array-backed table of packets
+class PacketTable:
+    """
+    Packets stored as NumPy columns instead of one Packet object per row.
+    Timestamps and deadlines are epoch nanoseconds, IPs are uint32, protocol and
+    QoS class are uint8 codes into PROTOCOLS / QOS_CLASSES, sizes are uint16.
+    """
+    def __init__(self, timestamp, source_ip, destination_ip, protocol, packet_size, qos_class, deadline=None):
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.source_ip = np.asarray(source_ip, dtype=np.uint32)
+        self.destination_ip = np.asarray(destination_ip, dtype=np.uint32)
+        self.protocol = np.asarray(protocol, dtype=np.uint8)
+        self.packet_size = np.asarray(packet_size, dtype=np.uint16)
+        self.qos_class = np.asarray(qos_class, dtype=np.uint8)
+        if deadline is None:
+            deadline = self.calculate_deadlines()
+        self.deadline = np.asarray(deadline, dtype=np.int64)
+
+    def calculate_deadlines(self):
+        # Same policy as Packet.calculate_deadline, computed for the whole column at once
+        deadline = self.timestamp + DEADLINE_NS[self.qos_class]
+        deadline[self.qos_class == QOS_URLLC] = NO_DEADLINE
+        return deadline
+
+    def columns(self):
+        return (self.timestamp, self.source_ip, self.destination_ip,
+                self.protocol, self.packet_size, self.qos_class, self.deadline)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, key):
+        # Slices and boolean/integer masks select rows without building Packet objects
+        return PacketTable(*(column[key] for column in self.columns()))
+
+    def split_by_qos(self):
+        """
+        Return one sub-table per QoS class, in QOS_CLASSES order.
+        """
+        return [self[self.qos_class == code] for code in range(len(QOS_CLASSES))]
+
+    @classmethod
+    def concat(cls, tables):
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        return cls(*(np.concatenate(columns) for columns in zip(*(t.columns() for t in tables))))
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [], [])
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Build a table from a DataFrame with the CSV_COLUMNS layout.
+        """
+        timestamps = pd.to_datetime(frame["Timestamp"], format="ISO8601")
+        return cls(
+            timestamps.to_numpy(dtype="datetime64[ns]").view(np.int64),
+            ip_to_uint32(frame["Source IP"]),
+            ip_to_uint32(frame["Destination IP"]),
+            encode_labels(frame["Protocol"], PROTOCOLS, PROTOCOL_UNKNOWN),
+            frame["Packet Size (Bytes)"].to_numpy(),
+            encode_labels(frame["QoS Class"], QOS_CLASSES, QOS_MMTC),  # Unknown classes go to mMTC, as in add_packet
+        )
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a table over trace_format records. The columns are views of the
+        records, so a memory-mapped trace is not copied.
+        """
+        return cls(*(records[name] for name in ("timestamp", "source_ip", "destination_ip",
+                                                "protocol", "packet_size", "qos_class")))
+
+    def to_records(self):
+        return pack_records({name: getattr(self, name) for name in RECORD_DTYPE.names})
+
+    @classmethod
+    def from_packets(cls, packets):
+        # Small conversions (single live packets) skip pandas entirely
+        packets = list(packets)
+        protocol_codes = {name: code for code, name in enumerate(PROTOCOLS)}
+        qos_codes = {name: code for code, name in enumerate(QOS_CLASSES)}
+        return cls(
+            [datetime_to_ns(p.timestamp) for p in packets],
+            [int.from_bytes(bytes(map(int, p.source_ip.split("."))), "big") for p in packets],
+            [int.from_bytes(bytes(map(int, p.destination_ip.split("."))), "big") for p in packets],
+            [protocol_codes.get(p.protocol, PROTOCOL_UNKNOWN) for p in packets],
+            [p.packet_size for p in packets],
+            [qos_codes.get(p.qos_class, QOS_MMTC) for p in packets],
+        )
+
+# Queueing disciplines. Every queued table holds packets of one QoS class sorted by
+# timestamp, and therefore by deadline, so misses always form a prefix of a table.
+class PriorityQueues:
+    """
+    Strict priority between three FIFO queues: uRLLC, then eMBB, then mMTC.
+    """
+    def __init__(self):
+        self.urllc_queue = deque()  # uRLLC packets queue (no priority)
+        self.embb_queue = deque()    # eMBB packets queue
+        self.mmtc_queue = deque()    # mMTC packets queue
+        self.queues = (self.urllc_queue, self.embb_queue, self.mmtc_queue)  # Strict priority order
+        self.remaining = 0  # Packets that may still be served in the current slot
+
+    def push(self, code, table):
+        self.queues[code].append(table)
+
+    def has_pending(self):
+        return any(self.queues)
+
+    def serve_fifo(self, code, queue_, now):
+        # Yields (code, table, dropped) in service order until the slot is full
+        while queue_ and self.remaining > 0:
+            table = queue_.popleft()
+            expired = int(np.searchsorted(table.deadline, now, side="left"))
+            served = int(min(len(table) - expired, self.remaining))
+            if expired:
+                yield code, table[:expired], True
+            if served:
+                yield code, table if served == len(table) else table[expired:expired + served], False
+            self.remaining -= served
+            if expired + served < len(table):
+                queue_.appendleft(table[expired + served:])
+
+    def serve(self, now, capacity):
+        self.remaining = capacity
+        for code, queue_ in enumerate(self.queues):
+            yield from self.serve_fifo(code, queue_, now)
+
+class KeyedQueues(PriorityQueues):
+    """
+    Base for disciplines that serve packets in order of a sort key that is
+    non-decreasing within each class. Every class keeps a FIFO of (table, keys);
+    a slot takes up to `remaining` queued packets from the front of each class,
+    turns their stored keys into sort keys (sort_keys), finds the smallest
+    `remaining` of them with one argsort, and serves one contiguous run per
+    class. With unlimited capacity everything queued is served, so no merge is
+    needed. With urllc_priority, uRLLC keeps its strict-priority FIFO.
+    """
+    urllc_priority = False
+
+    def __init__(self):
+        super().__init__()
+        self.keyed = tuple(deque() for _ in QOS_CLASSES)  # (table, keys) per class
+
+    def packet_keys(self, code, table):
+        raise NotImplementedError
+
+    def sort_keys(self, code, keys):
+        # Sort keys of the packets at the front of a class, from their stored keys
+        return keys
+
+    def on_served(self, code, last_key):
+        pass
+
+    def push(self, code, table):
+        if code == QOS_URLLC and self.urllc_priority:
+            super().push(code, table)
+            return
+        self.keyed[code].append((table, self.packet_keys(code, table)))
+
+    def has_pending(self):
+        return super().has_pending() or any(self.keyed)
+
+    def front_keys(self, code, now, limit):
+        # Drops expired packets from the front tables of a class and returns them
+        # with the keys of up to `limit` queued packets that follow
+        queue_ = self.keyed[code]
+        dropped, keys = [], []
+        count = index = 0
+        while index < len(queue_) and count < limit:
+            table, table_keys = queue_[index]
+            expired = int(np.searchsorted(table.deadline, now, side="left"))
+            if expired:
+                dropped.append(table[:expired])
+                if expired == len(table):
+                    del queue_[index]
+                    continue
+                table, table_keys = table[expired:], table_keys[expired:]
+                queue_[index] = (table, table_keys)
+            keys.append(table_keys[:limit - count])
+            count += len(keys[-1])
+            index += 1
+        return dropped, keys
+
+    def take_front(self, code, count):
+        # Removes the first `count` queued packets of a class as one table
+        queue_ = self.keyed[code]
+        parts = []
+        while count:
+            table, keys = queue_.popleft()
+            if count < len(table):
+                queue_.appendleft((table[count:], keys[count:]))
+                table = table[:count]
+            parts.append(table)
+            count -= len(table)
+        return parts[0] if len(parts) == 1 else PacketTable.concat(parts)
+
+    def serve(self, now, capacity):
+        self.remaining = capacity
+        yield from self.serve_fifo(QOS_URLLC, self.urllc_queue, now)
+        if self.remaining <= 0 or not any(self.keyed):
+            return
+        if np.isinf(self.remaining):
+            # Every queued packet is served this slot, so the order between classes does not matter
+            for code, queue_ in enumerate(self.keyed):
+                served = []
+                while queue_:
+                    table, keys = queue_.popleft()
+                    expired = int(np.searchsorted(table.deadline, now, side="left"))
+                    if expired:
+                        yield code, table[:expired], True
+                    if expired < len(table):
+                        yield code, table[expired:], False
+                        served.append(keys[expired:])
+                if served:
+                    self.on_served(code, self.sort_keys(code, np.concatenate(served))[-1])
+            return
+
+        limit = int(self.remaining)
+        codes, candidates = [], []
+        for code in range(len(QOS_CLASSES)):
+            dropped, keys = self.front_keys(code, now, limit)
+            for table in dropped:
+                yield code, table, True
+            if keys:
+                codes.append(code)
+                candidates.append(self.sort_keys(code, np.concatenate(keys)))
+        if not candidates:
+            return
+        # The smallest `limit` keys form a prefix of every class (ties go to the lower class code)
+        keys = np.concatenate(candidates)
+        labels = np.repeat(codes, [len(part) for part in candidates])
+        order = np.argsort(keys, kind="stable")[:limit]
+        counts = np.bincount(labels[order], minlength=len(QOS_CLASSES))
+        for code, part in zip(codes, candidates):
+            count = int(counts[code])
+            if count:
+                yield code, self.take_front(code, count), False
+                self.on_served(code, part[count - 1])
+        self.remaining -= len(order)
+
+class EdfQueues(KeyedQueues):
+    """
+    Earliest deadline first across eMBB and mMTC, keyed on the packet deadline.
+    uRLLC packets have no deadline and stay strictly first.
+    """
+    urllc_priority = True
+
+    def packet_keys(self, code, table):
+        return table.deadline
+
+class WfqQueues(KeyedQueues):
+    """
+    Weighted fair queueing (self-clocked variant) across all three classes. A
+    packet's finish tag is the tag of its class's last served packet +
+    size / weight; a class that was idle restarts from V, the largest tag
+    served so far. Tags are computed when packets reach the front of their
+    queue (one cumulative sum per slot), so packets dropped for missing their
+    deadline never advance their class's tags and an overloaded class is not
+    starved.
+    """
+    def __init__(self, weights=WFQ_WEIGHTS):
+        super().__init__()
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.last_finish = np.zeros(len(QOS_CLASSES))
+        self.virtual_time = 0.0
+        self.backlogged = np.zeros(len(QOS_CLASSES), dtype=bool)  # Classes with packets left after the last slot
+
+    def packet_keys(self, code, table):
+        # Service cost of every packet; its finish tag is set when it reaches the front
+        return table.packet_size / self.weights[code]
+
+    def sort_keys(self, code, keys):
+        start = self.last_finish[code] if self.backlogged[code] else max(self.virtual_time, self.last_finish[code])
+        return start + np.cumsum(keys)
+
+    def on_served(self, code, last_key):
+        self.last_finish[code] = last_key
+        self.virtual_time = max(self.virtual_time, float(last_key))
+
+    def serve(self, now, capacity):
+        yield from super().serve(now, capacity)
+        self.backlogged = np.array([bool(queue_) for queue_ in self.keyed])
+
+DISCIPLINES = {"priority": PriorityQueues, "edf": EdfQueues, "wfq": WfqQueues}
+
+# Function to describe the settings a checkpoint must be resumed with
+def checkpoint_settings(queues, slot_capacity):
+    names = [name for name, discipline in DISCIPLINES.items() if type(queues) is discipline]
+    return {
+        "discipline": names[0] if names else type(queues).__name__,
+        "slot_capacity": "unlimited" if slot_capacity is None else slot_capacity,
+        "weights": getattr(queues, "weights", np.zeros(0)),
+    }
+
 # Scheduler class
 class Scheduler:
-    def __init__(self):
-        self.urllc_queue = queue.Queue()  # uRLLC packets queue (no priority)
-        self.embb_queue = queue.Queue()    # eMBB packets queue
-        self.mmtc_queue = queue.Queue()    # mMTC packets queue
-        self.output_log = []  # List to store output for logging
+    """
+    Discrete-event scheduler driven by each packet's own Timestamp. Arrivals and
+    slot boundaries are kept in a heap-ordered event queue and `now` is a virtual
+    clock in epoch nanoseconds, so a trace replays as fast as the CPU allows and
+    deadline drops do not depend on the host. With realtime=True the event loop is
+    paced against the wall clock instead. `discipline` picks the queueing
+    discipline: a DISCIPLINES name or an instance such as WfqQueues(weights).
+    An optional event_log (event_log.EventLogSink) gets one binary record per
+    processed or dropped packet, alongside or instead of the text log. An
+    optional latency recorder (latency.LatencyRecorder) gets the queueing delay
+    of every served packet on the scheduler's clock (timestamp to slot) and its
+    service latency on the monotonic clock (slot start to hand-off). An optional
+    checkpoint (checkpoint.Checkpointer) gets a snapshot of the scheduler state
+    after a slot whenever its interval has passed (see checkpoint_state).
+    """
+    def __init__(self, time_slot=TIME_SLOT, slot_capacity=None, realtime=False, log_sink=None,
+                 discipline="priority", event_log=None, latency=None, checkpoint=None):
+        self.queues = DISCIPLINES[discipline]() if isinstance(discipline, str) else discipline
+        # Bounded, asynchronous log; formatting and I/O happen on its writer thread
+        self.log_sink = log_sink if log_sink is not None else AsyncLogSink(OUTPUT_FILE, echo=True)
+        self.event_log = event_log
+        self.latency = latency
+        self.slot_ns = int(time_slot * 1e9)
+        self.slot_capacity = slot_capacity  # Packets served per slot; None drains every queue
+        self.realtime = realtime
+        self.events = []  # Heap of (time_ns, kind, seq, payload)
+        self.event_seq = itertools.count()
+        self.now = None  # Virtual clock (epoch ns)
+        self.slot_origin = None
+        self.next_slot_time = None  # Time of the SLOT event currently in the heap
+        self.processed_counts = np.zeros(len(QOS_CLASSES), dtype=np.int64)
+        self.dropped_counts = np.zeros(len(QOS_CLASSES), dtype=np.int64)
+        self.checkpoint = checkpoint
+        self.late_rows = 0  # Streamed rows that were already older than the clock when read
+        self.trace_reader = None  # PacketChunkReader of process_stream, whose offset is checkpointed
 
     def add_packet(self, packet):
-        if packet.qos_class == "uRLLC":
-            self.urllc_queue.put(packet)  # All uRLLC packets are processed without deadlines
-        elif packet.qos_class == "eMBB":
-            self.embb_queue.put(packet)
+        if not isinstance(packet, PacketTable):
+            packet = PacketTable.from_packets([packet])
+        if not len(packet):
+            return
+        # Arrivals are admitted in timestamp order, one event per table
+        if np.any(packet.timestamp[1:] < packet.timestamp[:-1]):
+            packet = packet[np.argsort(packet.timestamp, kind="stable")]
+        self.schedule_event(packet.timestamp[0], ARRIVAL, packet)
+
+    def schedule_event(self, time_ns, kind, payload=None):
+        heapq.heappush(self.events, (int(time_ns), kind, next(self.event_seq), payload))
+
+    def slot_boundary(self, time_ns):
+        # First slot boundary at or after time_ns; slots are aligned to the first arrival
+        if self.slot_origin is None:
+            self.slot_origin = time_ns
+        slots = -(-(time_ns - self.slot_origin) // self.slot_ns)
+        return self.slot_origin + slots * self.slot_ns
+
+    def handle_arrival(self, table):
+        # Admit every packet that arrives before the next slot boundary in one step
+        boundary = self.slot_boundary(self.now)
+        cut = count_until(table.timestamp, boundary)
+        admitted = table[:cut] if cut < len(table) else table
+        classes = admitted.qos_class
+        if classes[0] == classes[-1] and (len(classes) < 3 or (classes == classes[0]).all()):
+            # Sparse traffic (e.g. one shard of a trace) mostly admits a single class per slot
+            self.queues.push(int(classes[0]), admitted)
         else:
-            self.mmtc_queue.put(packet)
+            for code, part in enumerate(admitted.split_by_qos()):
+                if len(part):
+                    self.queues.push(code, part)
+        if cut < len(table):
+            rest = table[cut:]
+            self.schedule_event(rest.timestamp[0], ARRIVAL, rest)
+        if self.next_slot_time is None:
+            self.next_slot_time = boundary
+            self.schedule_event(boundary, SLOT)
 
-    def log_output(self, message):
-        print(message)  # Print to console
-        self.output_log.append(message)  # Store in output log
+    def handle_slot(self):
+        self.process_slot()
+        # Keep ticking only while there is something queued; idle gaps are skipped
+        if self.has_pending():
+            self.next_slot_time = self.now + self.slot_ns
+            self.schedule_event(self.next_slot_time, SLOT)
+        else:
+            self.next_slot_time = None
+
+    def run(self, until=None):
+        """
+        Handle events in time order, stopping before the first event at or after `until`.
+        """
+        wall_start = virtual_start = None
+        while self.events and (until is None or self.events[0][0] < until):
+            time_ns, kind, _, payload = heapq.heappop(self.events)
+            if self.realtime:
+                # Pace the virtual clock against the wall clock
+                if wall_start is None:
+                    wall_start, virtual_start = time.monotonic(), time_ns
+                delay = (time_ns - virtual_start) / 1e9 - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            # Late arrivals never move the clock backwards
+            self.now = time_ns if self.now is None else max(self.now, time_ns)
+            if kind == ARRIVAL:
+                self.handle_arrival(payload)
+            else:
+                self.handle_slot()
+                if self.checkpoint is not None and self.checkpoint.due():
+                    self.checkpoint.save(self.checkpoint_state())
+
+    def log_output(self, message, *args):
+        self.log_sink.emit(message, *args)  # Console and file output happen off the hot path
+
+    def process_table(self, table, code, dropped):
+        qos_name = QOS_CLASSES[code]
+        if dropped:
+            self.dropped_counts[code] += len(table)
+            message = f"{qos_name} Packet dropped due to deadline miss"
+        else:
+            self.processed_counts[code] += len(table)
+            message = f"Processing {qos_name} Packet"
+        if not self.log_sink.quiet:
+            # One record per table; the per-packet lines are formatted by the writer thread
+            self.log_output(format_packet_lines, message, table.source_ip, table.destination_ip)
+        if self.event_log is not None:
+            self.event_log.emit(table_records, DROPPED if dropped else PROCESSED, code, self.now, table)
+
+    def has_pending(self):
+        return self.queues.has_pending()
 
     def process_packets(self):
-        while not self.urllc_queue.empty() or not self.embb_queue.empty() or not self.mmtc_queue.empty():
-            # Process uRLLC packets first (all will be processed)
-            while not self.urllc_queue.empty():
-                packet = self.urllc_queue.get()
-                self.log_output(f"Processing uRLLC Packet: {packet.source_ip} -> {packet.destination_ip}")
-
-            # Then process eMBB packets
-            while not self.embb_queue.empty():
-                packet = self.embb_queue.get()
-                # Check deadline
-                if datetime.now() <= packet.deadline:
-                    self.log_output(f"Processing eMBB Packet: {packet.source_ip} -> {packet.destination_ip}")
-                else:
-                    self.log_output(f"eMBB Packet dropped due to deadline miss: {packet.source_ip} -> {packet.destination_ip}")
-
-            # Then process mMTC packets
-            while not self.mmtc_queue.empty():
-                packet = self.mmtc_queue.get()
-                # Check deadline
-                if datetime.now() <= packet.deadline:
-                    self.log_output(f"Processing mMTC Packet: {packet.source_ip} -> {packet.destination_ip}")
-                else:
-                    self.log_output(f"mMTC Packet dropped due to deadline miss: {packet.source_ip} -> {packet.destination_ip}")
-
-            # Wait for the next time slot
-            time.sleep(TIME_SLOT)
+        # Replay everything that has been added on the virtual clock
+        self.run()
+        if self.latency is not None:
+            self.latency.report_snapshot()
 
         # After processing, write log to file
         self.write_output_to_file()
 
+    def process_stream(self, chunks):
+        # Schedule each chunk as soon as it has been read instead of loading the whole trace first
+        self.trace_reader = chunks
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            if self.now is not None:
+                # The trace is not in timestamp order: these rows can only be admitted late,
+                # when eMBB and mMTC packets have usually missed their deadline already
+                late = int(np.count_nonzero(chunk.timestamp < self.now))
+                if late and not self.late_rows:
+                    print(f"Warning: the stream is not in timestamp order; {late} rows of a chunk are older than "
+                          f"the scheduler clock and are admitted late", file=sys.stderr)
+                self.late_rows += late
+            self.add_packet(chunk)
+            # Later chunks may still hold packets with the last timestamp seen so far
+            self.run(until=chunk.timestamp.max())
+        if self.late_rows:
+            print(f"Warning: {self.late_rows} rows arrived out of timestamp order and were admitted late; "
+                  f"sort the trace or schedule it without --stream", file=sys.stderr)
+
+        # Drain whatever is left and write the log
+        self.process_packets()
+
+    def process_slot(self):
+        # One scheduling pass at the current slot boundary: the queueing discipline
+        # decides the order until slot_capacity packets have been served
+        capacity = self.slot_capacity if self.slot_capacity is not None else np.inf
+        if self.latency is None:
+            for code, table, dropped in self.queues.serve(self.now, capacity):
+                self.process_table(table, code, dropped)
+            return
+        started = time.monotonic_ns()
+        for code, table, dropped in self.queues.serve(self.now, capacity):
+            self.process_table(table, code, dropped)
+            if not dropped:
+                self.latency.record_packets(code, self.now - table.timestamp, time.monotonic_ns() - started)
+        self.latency.tick()
+
+    def checkpoint_state(self):
+        """
+        Copy of everything needed to continue a replay: the queued packets (with
+        their sort keys), the admitted-later remainders of read chunks, the
+        virtual clock, the counters, the discipline's own state and the offset
+        of the next unread row of the stream. Packets are stored as trace
+        records, split into the same tables they were queued as.
+        """
+        fifo = [table for queue_ in self.queues.queues for table in queue_]
+        keyed = [entry for queue_ in getattr(self.queues, "keyed", ()) for entry in queue_]
+        pending = [payload for _, kind, _, payload in sorted(self.events, key=lambda event: event[:3])
+                   if kind == ARRIVAL]
+        state = {
+            "mode": np.array(CHECKPOINT_MODE),
+            "clock": np.array([UNSET_NS if value is None else value
+                               for value in (self.now, self.slot_origin, self.next_slot_time)], dtype=np.int64),
+            "slot_ns": np.int64(self.slot_ns),
+            "processed_counts": self.processed_counts.copy(),
+            "dropped_counts": self.dropped_counts.copy(),
+            "late_rows": np.int64(self.late_rows),
+            **{f"settings.{name}": np.array(value) for name, value in
+               checkpoint_settings(self.queues, self.slot_capacity).items()},
+            **object_state(self.queues, "queues"),
+        }
+        for name, tables in (("fifo", fifo), ("keyed", [table for table, _ in keyed]), ("pending", pending)):
+            state[f"{name}_records"] = PacketTable.concat(tables).to_records()
+            state[f"{name}_lengths"] = np.array([len(table) for table in tables], dtype=np.int64)
+        if keyed:
+            state["keyed_keys"] = np.concatenate([keys for _, keys in keyed])
+        if self.trace_reader is not None:
+            state["trace_file"] = np.array(self.trace_reader.filename)
+            state["trace_position"] = np.int64(self.trace_reader.position)
+            state["trace_rows"] = np.int64(self.trace_reader.rows_read)
+        return state
+
+    def restore_state(self, state):
+        # Inverse of checkpoint_state, on a freshly created scheduler with the same discipline and capacity
+        check_mode(state, CHECKPOINT_MODE)
+        check_settings(state, checkpoint_settings(self.queues, self.slot_capacity))
+        self.now, self.slot_origin, self.next_slot_time = (None if value == UNSET_NS else value
+                                                           for value in state["clock"].tolist())
+        self.slot_ns = int(state["slot_ns"])
+        self.processed_counts = state["processed_counts"].copy()
+        self.dropped_counts = state["dropped_counts"].copy()
+        self.late_rows = int(state["late_rows"])
+        restore_object(self.queues, state, "queues")
+        tables = {}
+        for name in ("fifo", "keyed", "pending"):
+            ends = np.cumsum(state[f"{name}_lengths"])
+            records = state[f"{name}_records"]
+            tables[name] = [PacketTable.from_records(records[end - length:end])
+                            for end, length in zip(ends.tolist(), state[f"{name}_lengths"].tolist())]
+        for table in tables["fifo"]:
+            self.queues.queues[int(table.qos_class[0])].append(table)
+        if tables["keyed"]:
+            ends = np.cumsum(state["keyed_lengths"])
+            for table, end in zip(tables["keyed"], ends.tolist()):
+                self.queues.keyed[int(table.qos_class[0])].append((table, state["keyed_keys"][end - len(table):end]))
+        for table in tables["pending"]:
+            self.schedule_event(table.timestamp[0], ARRIVAL, table)
+        if self.next_slot_time is not None:
+            self.schedule_event(self.next_slot_time, SLOT)
+
     def write_output_to_file(self):
-        with open(OUTPUT_FILE, "w") as f:
-            for line in self.output_log:
-                f.write(f"{line}\n")  # Write each log entry on a new line
-        print(f"Output written to {OUTPUT_FILE}")
+        # Flush the log sink; its file has been written incrementally
+        if self.checkpoint is not None:
+            self.checkpoint.close(self.checkpoint_state())  # The final state: nothing left to resume
+        self.log_sink.close()
+        if self.event_log is not None:
+            self.event_log.close()
+        if not self.log_sink.quiet:
+            print(f"Output written to {self.log_sink.filename}")
 
-# Function to load packets from CSV file
+# Function to load packets from CSV file into a columnar PacketTable
 def load_packets_from_csv(filename):
-    packets = []
-    with open(filename, mode='r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            packet = Packet(
-                row["Timestamp"],
-                row["Source IP"],
-                row["Destination IP"],
-                row["Protocol"],
-                row["Packet Size (Bytes)"],
-                row["QoS Class"]
-            )
-            packets.append(packet)
-    return packets
+    # Binary traces and .npy column directories (see trace_format.py) are memory-mapped instead of parsed
+    if is_trace(filename):
+        return PacketTable.from_records(open_trace(filename))
+    if is_column_directory(filename):
+        return PacketTable.from_records(open_columns(filename))
+    frame = pd.read_csv(filename, usecols=CSV_COLUMNS, dtype={"Packet Size (Bytes)": np.uint16})
+    return PacketTable.from_frame(frame)
+
+# Streaming reader that yields a trace as bounded PacketTable chunks
+class PacketChunkReader:
+    """
+    Read a traffic CSV in blocks of roughly chunk_size rows. Each block is cut at a
+    line boundary and parsed on its own, so memory stays bounded by the chunk size.
+    Binary traces and .npy column directories are sliced from their memory maps in
+    chunks of exactly chunk_size. After each chunk is yielded, `position` is the byte
+    offset of the next unread row (for a column directory, only rows_read is used).
+    A reader created with a saved position and rows_read continues from there.
+    """
+    def __init__(self, filename, chunk_size=DEFAULT_CHUNK_SIZE, position=0, rows_read=0):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.position = position
+        self.rows_read = rows_read
+
+    def __iter__(self):
+        if is_trace(self.filename):
+            yield from self.iter_trace()
+            return
+        if is_column_directory(self.filename):
+            yield from self.iter_columns()
+            return
+        with open(self.filename, mode='rb') as file:
+            names = file.readline().decode().strip().split(",")
+            if not self.position:
+                self.position = file.tell()
+            file.seek(self.position)
+            row_bytes = max(len(file.readline()), 1)  # First guess of the row width, refined per block
+            file.seek(self.position)
+
+            while True:
+                block = file.read(self.chunk_size * row_bytes)
+                if not block:
+                    break
+                block += file.readline()  # Finish the last, partially read row
+                frame = pd.read_csv(io.BytesIO(block), header=None, names=names, usecols=CSV_COLUMNS,
+                                    dtype={"Packet Size (Bytes)": np.uint16})
+                self.position = file.tell()
+                self.rows_read += len(frame)
+                row_bytes = max(len(block) // max(len(frame), 1), 1)
+                yield PacketTable.from_frame(frame)
+
+    def iter_trace(self):
+        records = open_trace(self.filename)
+        for first in range(self.rows_read, len(records), self.chunk_size):
+            chunk = records[first:first + self.chunk_size]
+            self.rows_read += len(chunk)
+            self.position = HEADER_SIZE + self.rows_read * RECORD_DTYPE.itemsize
+            yield PacketTable.from_records(chunk)
+
+    def iter_columns(self):
+        columns = open_columns(self.filename)
+        for first in range(self.rows_read, len(columns["timestamp"]), self.chunk_size):
+            chunk = {name: column[first:first + self.chunk_size] for name, column in columns.items()}
+            self.rows_read += len(chunk["timestamp"])
+            yield PacketTable.from_records(chunk)
 
 # Example Usage
 def main():
-    scheduler = Scheduler()
+    parser = argparse.ArgumentParser(description="Schedule 5G traffic from a CSV or binary trace.")
+    parser.add_argument("csv", nargs="?", default="/home/aditya/UpgradScheduler/Dataset/5g_network_traffic.csv",
+                        help="traffic CSV, a binary trace written by trace_format.py, "
+                             "or a directory of .npy columns from Dataset/dataset.py --format npy")
+    parser.add_argument("--stream", action="store_true",
+                        help="schedule chunks while the file is being read (the file must be sorted by timestamp)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per streamed chunk")
+    parser.add_argument("--slot-capacity", type=int, default=None, help="packets served per time slot")
+    parser.add_argument("--realtime", action="store_true", help="pace the replay against the wall clock")
+    parser.add_argument("--discipline", choices=DISCIPLINES, default="priority", help="queueing discipline")
+    parser.add_argument("--wfq-weights", type=float, nargs=3, default=WFQ_WEIGHTS, metavar=("URLLC", "EMBB", "MMTC"),
+                        help="per-class weights for --discipline wfq")
+    parser.add_argument("--quiet", action="store_true", help="skip per-packet log lines entirely")
+    parser.add_argument("--no-echo", action="store_true", help="write the log file without copying it to the console")
+    parser.add_argument("--log-policy", choices=POLICIES, default=BLOCK, help="what to do when the log buffer is full")
+    parser.add_argument("--event-log", default=None, metavar="PATH",
+                        help="also write fixed-size binary event records (see event_log.py) to PATH")
+    parser.add_argument("--latency", action="store_true",
+                        help="record per-QoS queueing and service latency histograms and report snapshots")
+    parser.add_argument("--latency-interval", type=float, default=REPORT_INTERVAL,
+                        help="seconds between latency snapshots")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+                        help="periodically save the scheduler state to PATH (implies --stream)")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="seconds between checkpoints")
+    parser.add_argument("--resume", default=None, metavar="PATH",
+                        help="continue the replay saved in a checkpoint; the logs are appended to")
+    args = parser.parse_args()
+
+    discipline = WfqQueues(args.wfq_weights) if args.discipline == "wfq" else DISCIPLINES[args.discipline]()
+    state = read_checkpoint(args.resume) if args.resume else None
+    if state is not None:
+        # A checkpoint resumes only with the discipline, weights and slot capacity it was written with
+        try:
+            check_mode(state, CHECKPOINT_MODE)
+            check_settings(state, checkpoint_settings(discipline, args.slot_capacity))
+        except ValueError as error:
+            parser.error(str(error))
+    mode = "a" if state is not None else "w"
+    log_sink = AsyncLogSink(OUTPUT_FILE, policy=args.log_policy, echo=not args.no_echo, quiet=args.quiet, mode=mode)
+    event_log = EventLogSink(args.event_log, policy=args.log_policy, mode=mode + "b") if args.event_log else None
+    latency = None
+    if args.latency:
+        # The overhead budget applies to wall-clock paced replays only
+        latency = LatencyRecorder(QOS_CLASSES, LATENCY_THRESHOLD_URLLC, QOS_URLLC, args.latency_interval,
+                                  budget=OVERHEAD_BUDGET if args.realtime else None)
+    checkpoint = Checkpointer(args.checkpoint, args.checkpoint_interval) if args.checkpoint else None
+    scheduler = Scheduler(slot_capacity=args.slot_capacity, realtime=args.realtime, log_sink=log_sink,
+                          discipline=discipline, event_log=event_log, latency=latency, checkpoint=checkpoint)
+
+    if state is not None:
+        # Restore queues, clock and counters, then read on from the first row not yet consumed
+        scheduler.restore_state(state)
+        scheduler.process_stream(PacketChunkReader(str(state["trace_file"]), args.chunk_size,
+                                                   int(state["trace_position"]), int(state["trace_rows"])))
+    elif args.stream or checkpoint is not None:
+        # Feed the scheduler chunk by chunk; peak memory is bounded by the chunk size
+        scheduler.process_stream(PacketChunkReader(args.csv, args.chunk_size))
+    else:
+        # Load packets from the CSV file
+        packets = load_packets_from_csv(args.csv)
 
-    # Load packets from the CSV file
-    packets = load_packets_from_csv("/home/aditya/UpgradScheduler/Dataset/5g_network_traffic.csv")
+        # Add the whole table to the scheduler in one call
+        scheduler.add_packet(packets)
 
-    # Add packets to the scheduler
-    for packet in packets:
-        scheduler.add_packet(packet)
+        # Start processing the packets
+        scheduler.process_packets()
 
-    # Start processing the packets
-    scheduler.process_packets()
+    if args.quiet:
+        # No per-packet lines were written, so report the totals instead
+        for qos_name, processed, dropped in zip(QOS_CLASSES, scheduler.processed_counts, scheduler.dropped_counts):
+            print(f"{qos_name}: {processed} processed, {dropped} dropped")
 
 if __name__ == "__main__":
     main()
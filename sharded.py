@@ -0,0 +1,232 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from event_log import EVENT_SUFFIX, EventLogSink
+from latency import LatencyRecorder
+from log_sink import AsyncLogSink
+from scheduler import (DEFAULT_CHUNK_SIZE, DISCIPLINES, LATENCY_THRESHOLD_URLLC, QOS_CLASSES, QOS_URLLC, TIME_SLOT,
+                       PacketChunkReader, PacketTable, Scheduler)
+from trace_format import TRACE_SUFFIX, is_trace, open_trace, write_trace
+
+# The CP scheduler lives in its own directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "CPScheduler"))
+from cpshed import CPScheduler
+from predictors import PREDICTORS
+
+HASH_MULTIPLIER = 0x9E3779B1  # Fibonacci hashing: neighbouring addresses land in different shards
+SHARD_KEYS = ("destination_ip", "source_ip")
+PARTITION_CHUNK = 1_000_000  # Records copied per write when a trace is partitioned
+
+# CPScheduler defaults, as in cpshed.py
+SLOTS_PER_FRAME = 50
+LATENCY_CONSTRAINT = 2
+ALPHA = 0.1
+GAMMA = 0.05
+FRAME_MINUTES = 5
+
+# Function to assign addresses to shards (cells) with a deterministic hash
+def shard_of(addresses, shards, seed=0):
+    """
+    The same address always maps to the same shard for a given seed, whatever
+    the process or machine, so a cell's traffic stays together and runs are
+    repeatable. Different seeds give different partitions.
+    """
+    hashed = ((np.asarray(addresses, dtype=np.uint64) ^ np.uint64(seed & 0xFFFFFFFF)) * np.uint64(HASH_MULTIPLIER))
+    return ((hashed & np.uint64(0xFFFFFFFF)) >> np.uint64(16)) % np.uint64(shards)
+
+# Function to partition a trace once, rewriting its records grouped by shard
+def partition_trace(trace_path, output_path, shards, key="destination_ip", seed=0):
+    """
+    Records keep their order within a shard, so every shard is a contiguous,
+    time-ordered run of the output trace. Returns the first row of every shard
+    followed by the total row count.
+    """
+    records = open_trace(trace_path)
+    shard = shard_of(records[key], shards, seed)
+    order = np.argsort(shard, kind="stable")
+    bounds = np.searchsorted(shard[order], np.arange(shards + 1))
+    write_trace(output_path, (records[order[first:first + PARTITION_CHUNK]]
+                              for first in range(0, len(order), PARTITION_CHUNK)))
+    return bounds.tolist()
+
+# Function to load one shard of a partitioned trace; every worker maps the same file
+def load_shard(trace_path, start, stop):
+    return PacketTable.from_records(open_trace(trace_path)[start:stop])
+
+def run_scheduler_shard(trace_path, shard, rows, options):
+    table = load_shard(trace_path, *rows)
+    started = time.perf_counter_ns()
+    event_log = None
+    if options["event_log_dir"]:
+        event_log = EventLogSink(os.path.join(options["event_log_dir"], f"shard{shard}{EVENT_SUFFIX}"))
+    latency = None
+    if options["latency"]:
+        # No periodic reports from the workers; the merged histograms are reported at the end
+        latency = LatencyRecorder(QOS_CLASSES, LATENCY_THRESHOLD_URLLC, QOS_URLLC, report_interval=None, budget=None)
+    scheduler = Scheduler(time_slot=options["time_slot"], slot_capacity=options["slot_capacity"],
+                          log_sink=AsyncLogSink(None, quiet=True), discipline=options["discipline"],
+                          event_log=event_log, latency=latency)
+    scheduler.add_packet(table)
+    scheduler.run()
+    scheduler.write_output_to_file()
+    if latency is not None:
+        latency.snapshot()  # Bins everything still buffered before the recorder is sent back
+    return {
+        "shard": shard,
+        "packets": len(table),
+        "processed": scheduler.processed_counts,
+        "dropped": scheduler.dropped_counts,
+        "latency": latency,
+        "seconds": (time.perf_counter_ns() - started) / 1e9,
+    }
+
+def run_cp_shard(trace_path, shard, rows, options):
+    table = load_shard(trace_path, *rows)
+    started = time.perf_counter_ns()
+    scheduler = CPScheduler(SLOTS_PER_FRAME, LATENCY_CONSTRAINT, ALPHA, GAMMA, None, options["frame_minutes"],
+                            predictor=options["predictor"])
+    scheduler.dataset = table
+    scheduler.index = scheduler.build_index(table)
+    # Every shard uses the same frame boundaries
+    results = scheduler.cp_based_scheduler(options["frames"], verbose=False, start_time=options["start"])
+    return {
+        "shard": shard,
+        "packets": len(table),
+        # With a predictor, predicted_* holds the forecasts and demand_* what actually arrived
+        "demand": np.array([results.get(f"demand_{name.lower()}", results[f"predicted_{name.lower()}"]).sum()
+                            for name in QOS_CLASSES]),
+        "allocated": np.array([results[f"{name.lower()}_allocated"].sum() for name in QOS_CLASSES]),
+        "successes": scheduler.success_count,
+        "frames": scheduler.frames_scheduled,
+        "theta": scheduler.theta,
+        "seconds": (time.perf_counter_ns() - started) / 1e9,
+    }
+
+ENGINES = {"scheduler": run_scheduler_shard, "cpscheduler": run_cp_shard}
+
+# Function to merge the latency recorders of every shard's result into one
+def merge_latency(results):
+    # Shards replay as fast as they can, so their overhead is reported without the real-time budget
+    merged = LatencyRecorder(QOS_CLASSES, LATENCY_THRESHOLD_URLLC, QOS_URLLC, report_interval=None, budget=None)
+    busy_ns = 0
+    for result in results:
+        recorder = result["latency"]
+        for total, part in zip(merged.queueing + merged.service, recorder.queueing + recorder.service):
+            total.merge(part)
+        merged.over_threshold += recorder.over_threshold
+        merged.overhead_ns += recorder.overhead_ns
+        merged.record_calls += recorder.record_calls
+        busy_ns += int(result["seconds"] * 1e9)
+    # Overhead is reported against the summed run time of the shards
+    merged.started = time.perf_counter_ns() - busy_ns
+    return merged
+
+# Function to run every shard of a trace over a process pool
+def run_sharded(trace_path, engine="scheduler", shards=None, workers=None, **options):
+    """
+    Shards are independent cells: each gets the packets whose options["key"]
+    address hashes to it and runs its own scheduler in a worker process. The
+    trace is hashed and partitioned once, here, so a worker only maps its own
+    rows. Results come back in shard order, so they do not depend on the number
+    of workers or on which worker finishes first.
+    """
+    shards = shards or os.cpu_count()
+    options = {"key": "destination_ip", "seed": 0, "discipline": "priority", "time_slot": TIME_SLOT,
+               "slot_capacity": None, "latency": False, "event_log_dir": None, "frames": None,
+               "frame_minutes": FRAME_MINUTES, "predictor": None, **options, "shards": shards}
+    if engine == "cpscheduler":
+        timestamps = open_trace(trace_path)["timestamp"]
+        if len(timestamps):
+            first, last = int(timestamps.min()), int(timestamps.max())
+            options["start"] = pd.Timestamp(first)
+            if options["frames"] is None:
+                frame_ns = int(options["frame_minutes"] * 60e9)
+                options["frames"] = (last - first) // frame_ns + 1
+        else:
+            options["start"], options["frames"] = pd.Timestamp(0), 0
+    if options["event_log_dir"]:
+        os.makedirs(options["event_log_dir"], exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        partitioned = os.path.join(directory, "shards" + TRACE_SUFFIX)
+        bounds = partition_trace(trace_path, partitioned, shards, options["key"], options["seed"])
+        with ProcessPoolExecutor(max_workers=workers or min(shards, os.cpu_count())) as pool:
+            futures = [pool.submit(ENGINES[engine], partitioned, shard, bounds[shard:shard + 2], options)
+                       for shard in range(shards)]
+            return [future.result() for future in futures]
+
+def print_scheduler_results(results):
+    processed = sum(result["processed"] for result in results)
+    dropped = sum(result["dropped"] for result in results)
+    for name, done, missed in zip(QOS_CLASSES, processed.tolist(), dropped.tolist()):
+        total = done + missed
+        print(f"{name}: {done} processed, {missed} dropped ({missed / total if total else 0:.2%})")
+    if results and results[0]["latency"] is not None:
+        merged = merge_latency(results)
+        print(merged.format_snapshot(merged.snapshot()))
+
+def print_cp_results(results):
+    demand = sum(result["demand"] for result in results)
+    allocated = sum(result["allocated"] for result in results)
+    for name, wanted, given in zip(QOS_CLASSES, demand.tolist(), allocated.tolist()):
+        print(f"{name}: demand = {wanted}, allocated = {given} ({given / wanted if wanted else 0:.2%})")
+    frames = sum(result["frames"] for result in results)
+    successes = sum(result["successes"] for result in results)
+    thetas = [result["theta"] for result in results]
+    print(f"URLLC success rate over {frames} cell-frames: {successes / frames if frames else 0:.2f} "
+          f"(theta {min(thetas):.3f} - {max(thetas):.3f})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many cells in parallel, one shard of the trace per cell.")
+    parser.add_argument("trace", help="traffic CSV or binary trace (a CSV is converted to a temporary trace first)")
+    parser.add_argument("--engine", choices=ENGINES, default="scheduler", help="scheduler run by every shard")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="number of cells")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per shard and core)")
+    parser.add_argument("--key", choices=SHARD_KEYS, default="destination_ip", help="address that picks the cell")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the shard hash")
+    parser.add_argument("--discipline", choices=DISCIPLINES, default="priority",
+                        help="queueing discipline of the scheduler engine")
+    parser.add_argument("--time-slot", type=float, default=TIME_SLOT,
+                        help="slot length in seconds for the scheduler engine")
+    parser.add_argument("--slot-capacity", type=int, default=None,
+                        help="packets each cell serves per slot (default: unlimited, so nothing is dropped)")
+    parser.add_argument("--latency", action="store_true", help="merge per-QoS latency histograms from every shard")
+    parser.add_argument("--event-log-dir", default=None, help="write one binary event log per shard into this directory")
+    parser.add_argument("--frames", type=int, default=None, help="frames per shard for the cpscheduler engine "
+                                                                  "(default: the whole trace)")
+    parser.add_argument("--frame-minutes", type=float, default=FRAME_MINUTES, help="frame length for cpscheduler")
+    parser.add_argument("--predictor", choices=sorted(PREDICTORS), default=None, help="online predictor for the cpscheduler engine")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        trace_path = args.trace
+        if not is_trace(trace_path):
+            # Convert once so that every worker can memory-map the same file
+            trace_path = os.path.join(directory, "traffic" + TRACE_SUFFIX)
+            write_trace(trace_path, (table.to_records() for table in PacketChunkReader(args.trace, DEFAULT_CHUNK_SIZE)))
+
+        start = time.perf_counter()
+        results = run_sharded(trace_path, args.engine, args.shards, args.workers, key=args.key, seed=args.seed,
+                              discipline=args.discipline, time_slot=args.time_slot, slot_capacity=args.slot_capacity,
+                              latency=args.latency, event_log_dir=args.event_log_dir,
+                              frames=args.frames, frame_minutes=args.frame_minutes, predictor=args.predictor)
+        elapsed = time.perf_counter() - start
+
+    packets = sum(result["packets"] for result in results)
+    sizes = [result["packets"] for result in results]
+    print(f"{packets} packets in {len(results)} shards ({min(sizes)} - {max(sizes)} per shard), "
+          f"{elapsed:.2f} s, {packets / elapsed:,.0f} packets/s")
+    if args.engine == "scheduler":
+        print_scheduler_results(results)
+    else:
+        print_cp_results(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "CPScheduler"))
+sys.path.insert(0, os.path.join(ROOT, "Dataset"))
+from cpshed import CPScheduler
+from dataset import plan_model_chunks, save_to_trace
+from log_sink import AsyncLogSink
+from scheduler import PacketChunkReader, Scheduler, WfqQueues
+
+CHUNK_SIZE = 500
+SAVE_AT = 7  # Checkpoint opportunity at which the interrupted run is saved
+
+# Stand-in for checkpoint.Checkpointer that keeps one snapshot and lets the run go on,
+# as the real one does while its writer thread has not serialized the snapshot yet
+class SnapshotAt:
+    def __init__(self, save_at):
+        self.calls = 0
+        self.save_at = save_at
+        self.state = None
+
+    def due(self):
+        self.calls += 1
+        return self.calls == self.save_at
+
+    def save(self, state):
+        self.state = state
+
+    def close(self, state=None):
+        pass
+
+@pytest.fixture(scope="module")
+def trace(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("traces") / "models.trace")
+    start_ns = pd.Timestamp("2024-10-16 00:00:00").value
+    save_to_trace(plan_model_chunks(600, 60, start_ns, seed=7, load=5), path)
+    return path
+
+def run_scheduler(trace, checkpoint=None, resume=None):
+    scheduler = Scheduler(slot_capacity=8, log_sink=AsyncLogSink(None, quiet=True), discipline=WfqQueues(),
+                          checkpoint=checkpoint)
+    if resume is None:
+        reader = PacketChunkReader(trace, CHUNK_SIZE)
+    else:
+        scheduler.restore_state(resume)
+        reader = PacketChunkReader(str(resume["trace_file"]), CHUNK_SIZE, int(resume["trace_position"]),
+                                   int(resume["trace_rows"]))
+    scheduler.process_stream(reader)
+    return scheduler
+
+def test_scheduler_resume_matches_uninterrupted_run(trace):
+    uninterrupted = run_scheduler(trace)
+    checkpoint = SnapshotAt(SAVE_AT)
+    interrupted = run_scheduler(trace, checkpoint)
+    assert checkpoint.state is not None
+    resumed = run_scheduler(trace, resume=checkpoint.state)
+
+    assert interrupted.dropped_counts.sum() > 0  # The capacity is low enough for the weights to matter
+    np.testing.assert_array_equal(resumed.processed_counts, uninterrupted.processed_counts)
+    np.testing.assert_array_equal(resumed.dropped_counts, uninterrupted.dropped_counts)
+
+def run_cp_stream(trace, checkpoint=None, resume=None):
+    scheduler = CPScheduler(50, 2, 0.1, 0.05, trace, frame_duration_minutes=0.1, streaming=True, predictor="lms")
+    scheduler.cp_based_scheduler_stream(CHUNK_SIZE, None, checkpoint, resume)
+    return scheduler
+
+def test_cp_stream_resume_matches_uninterrupted_run(trace, capsys):
+    uninterrupted = run_cp_stream(trace)
+    checkpoint = SnapshotAt(SAVE_AT)
+    run_cp_stream(trace, checkpoint)
+    assert checkpoint.state is not None
+    resumed = run_cp_stream(trace, resume=checkpoint.state)
+    capsys.readouterr()  # Per-frame tables
+
+    assert resumed.frames_scheduled == uninterrupted.frames_scheduled
+    assert resumed.success_count == uninterrupted.success_count
+    assert resumed.theta == uninterrupted.theta
+    np.testing.assert_array_equal(resumed.predictor.weights, uninterrupted.predictor.weights)
+
+def test_scheduler_resume_rejects_other_settings(trace):
+    checkpoint = SnapshotAt(SAVE_AT)
+    run_scheduler(trace, checkpoint)
+    scheduler = Scheduler(slot_capacity=8, log_sink=AsyncLogSink(None, quiet=True), discipline="edf")
+    with pytest.raises(ValueError, match="discipline wfq"):
+        scheduler.restore_state(checkpoint.state)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "CPScheduler"))
+sys.path.insert(0, os.path.join(ROOT, "Dataset"))
+from cpshed import CPScheduler
+from dataset import plan_model_chunks, save_to_trace
+
+FRAME_COUNT = 100  # Far more frames than the trace covers
+
+@pytest.mark.parametrize("predictor", [None, "lms"])
+def test_stream_schedules_as_many_frames_as_batch(tmp_path, capsys, predictor):
+    trace = str(tmp_path / "models.trace")
+    save_to_trace(plan_model_chunks(60, 60, pd.Timestamp("2024-10-16 00:00:00").value, seed=3), trace)
+
+    batch = CPScheduler(50, 2, 0.1, 0.05, trace, frame_duration_minutes=0.1, predictor=predictor)
+    results = batch.cp_based_scheduler(FRAME_COUNT, verbose=False)
+    stream = CPScheduler(50, 2, 0.1, 0.05, trace, frame_duration_minutes=0.1, streaming=True, predictor=predictor)
+    stream.cp_based_scheduler_stream(1000, FRAME_COUNT)
+    capsys.readouterr()  # Per-frame tables
+
+    assert stream.frames_scheduled == batch.frames_scheduled == FRAME_COUNT
+    assert stream.success_count == batch.success_count
+    assert stream.theta == pytest.approx(batch.theta)
+    np.testing.assert_array_equal(results["frame"], np.arange(FRAME_COUNT))
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from log_sink import AsyncLogSink
+from scheduler import QOS_EMBB, QOS_MMTC, PacketTable, Scheduler, WfqQueues
+
+SLOTS = 100
+PER_SLOT = 100  # Packets per slot of each class, far above the slot capacity
+
+# Function to build a trace where eMBB and mMTC both overload every slot with 500-byte packets
+def overloaded_table():
+    timestamps = np.repeat(np.arange(SLOTS) * 100_000_000 + 1, 2 * PER_SLOT)
+    classes = np.tile(np.repeat([QOS_EMBB, QOS_MMTC], PER_SLOT), SLOTS)
+    zeros = np.zeros(len(timestamps))
+    return PacketTable(timestamps, zeros, zeros, zeros, np.full(len(timestamps), 500), classes)
+
+@pytest.mark.parametrize("weights, share", [((4, 2, 1), 2 / 3), ((4, 1, 2), 1 / 3)])
+def test_wfq_shares_an_overloaded_slot_by_weight(weights, share):
+    scheduler = Scheduler(slot_capacity=20, log_sink=AsyncLogSink(None, quiet=True), discipline=WfqQueues(weights))
+    scheduler.add_packet(overloaded_table())
+    scheduler.run()
+    served = scheduler.processed_counts
+    assert served[QOS_EMBB] / (served[QOS_EMBB] + served[QOS_MMTC]) == pytest.approx(share, abs=0.01)
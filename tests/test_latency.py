@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from latency import PENDING_LIMIT, LatencyRecorder
+
+THRESHOLD_NS = 1_000_000
+
+def test_buffered_batches_match_a_direct_count():
+    rng = np.random.default_rng(4)
+    recorder = LatencyRecorder(("uRLLC", "eMBB", "mMTC"), THRESHOLD_NS / 1e9, report_interval=None)
+    queueing, service = [], []
+    for call in range(3 * PENDING_LIMIT):
+        batch = rng.integers(0, 2 * THRESHOLD_NS, size=int(rng.integers(0, 6)))
+        delay = int(rng.integers(0, 100_000))
+        # int64 arrays, other dtypes and lists all go through the same buffer
+        recorder.record_packets(call % 3, [batch, batch.astype(np.int32), batch.tolist()][call // 3 % 3], delay)
+        if call % 3 == 0:
+            queueing.append(batch)
+            service.append(np.full(len(batch), delay))
+    snapshot = recorder.snapshot()
+
+    queueing, service = np.concatenate(queueing), np.concatenate(service)
+    assert snapshot["classes"]["uRLLC"]["packets"] == len(queueing)
+    assert snapshot["over_threshold"] == np.count_nonzero(queueing + service > THRESHOLD_NS) / len(queueing)
+    assert recorder.service[0].total == len(queueing)
+    assert recorder.service[0].max == service.max()
@@ -0,0 +1,109 @@
+import argparse
+import os
+import struct
+
+import numpy as np
+
+# Binary trace layout: a fixed HEADER_SIZE-byte header followed by `count`
+# fixed-width records of RECORD_DTYPE (little-endian, no padding)
+MAGIC = b"5GTRACE\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHQ")  # magic, version, record size, record count
+HEADER_SIZE = 64  # HEADER is zero-padded to this size, so records start at a fixed offset
+TRACE_SUFFIX = ".trace"
+
+# Same column names and codes as scheduler.PacketTable
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),       # Epoch nanoseconds
+    ("source_ip", "<u4"),
+    ("destination_ip", "<u4"),
+    ("packet_size", "<u2"),
+    ("protocol", "u1"),         # Index into scheduler.PROTOCOLS
+    ("qos_class", "u1"),        # Index into scheduler.QOS_CLASSES
+])
+
+# Function to pack a header for count records
+def pack_header(count):
+    return HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, count).ljust(HEADER_SIZE, b"\0")
+
+# Function to read and check the header of a trace file; returns the record count
+def read_header(file):
+    header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError(f"{getattr(file, 'name', file)!r} is not a binary trace")
+    _, version, record_size, count = HEADER.unpack_from(header)
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported trace version {version} (record size {record_size})")
+    return count
+
+# Function to tell a binary trace from a CSV by its magic bytes
+def is_trace(filename):
+    if not os.path.isfile(filename):
+        return False
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+# Function to open a trace as a read-only memory map of records
+def open_trace(filename):
+    """
+    Nothing is parsed or copied: the records are mapped straight from the file,
+    pages are loaded on first access and shared by every process that maps the
+    same trace.
+    """
+    with open(filename, "rb") as file:
+        count = read_header(file)
+    if not count:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(filename, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+# Function to tell a directory of .npy columns (Dataset/dataset.py --format npy) by its timestamp file
+def is_column_directory(path):
+    return os.path.isfile(os.path.join(path, "timestamp.npy"))
+
+# Function to open a column directory as read-only memory maps, keyed like RECORD_DTYPE
+def open_columns(directory):
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in RECORD_DTYPE.names}
+
+# Function to pack a mapping of column arrays (RECORD_DTYPE names) into records
+def pack_records(columns):
+    records = np.empty(len(columns["timestamp"]), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        records[name] = columns[name]
+    return records
+
+# Function to write record chunks to a trace file
+def write_trace(filename, chunks):
+    """
+    Chunks are appended as they arrive and the record count is filled in last.
+    The file is written under a temporary name and renamed at the end, so
+    readers never map a partly written trace. Returns the number of records.
+    """
+    temporary = filename + ".tmp"
+    count = 0
+    with open(temporary, "wb") as file:
+        file.write(pack_header(0))
+        for records in chunks:
+            file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+            count += len(records)
+        file.seek(0)
+        file.write(pack_header(count))
+    os.replace(temporary, filename)
+    return count
+
+# Convert a CSV trace once, then open the binary trace instead
+def main():
+    # The CSV reader lives in scheduler.py, which itself imports this module
+    from scheduler import DEFAULT_CHUNK_SIZE, PacketChunkReader
+
+    parser = argparse.ArgumentParser(description="Convert a traffic CSV to the binary trace format.")
+    parser.add_argument("csv", help="input CSV with the scheduler.CSV_COLUMNS layout")
+    parser.add_argument("output", nargs="?", default=None, help=f"output trace (default: input with {TRACE_SUFFIX})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="CSV rows converted per chunk")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.csv)[0] + TRACE_SUFFIX
+    count = write_trace(output, (table.to_records() for table in PacketChunkReader(args.csv, args.chunk_size)))
+    print(f"Converted {count} packets to {output}.")
+
+if __name__ == "__main__":
+    main()